@@ -0,0 +1,120 @@
+"""
+Benchmark of the transient lookup query.
+
+Compares a plain select() built for every call, on an engine without
+asyncpg prepared statement caching, with TransientDAO.get_transient
+(a lambda statement) on the engine configured from settings.
+
+The statement part runs without a database. The throughput part needs the
+database from settings, filled with some transients, and runs a fixed
+number of concurrent workers looking up random names.
+
+Run it with `python benchmarks/db_queries.py [--workers 8] [--seconds 10]`.
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, List
+
+from sqlalchemy import lambda_stmt, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from tnsquery.db.dao.transient_dao import TransientDAO
+from tnsquery.db.models.transient_model import ATModel
+from tnsquery.db.utils import create_db_engine
+from tnsquery.settings import settings
+
+
+def plain_query(name: str) -> object:
+    return select(ATModel).where(ATModel.name == name)
+
+
+def cached_query(name: str) -> object:
+    return lambda_stmt(lambda: select(ATModel).where(ATModel.name == name))
+
+
+def bench_statements(number: int) -> None:
+    """Time building a statement and its cache key, which SQLAlchemy does on every execute."""
+    for label, build in (("select()", plain_query), ("lambda_stmt", cached_query)):
+        started = time.perf_counter()
+        for index in range(number):
+            build(f"2022a{index}")._generate_cache_key()  # type: ignore
+        elapsed = (time.perf_counter() - started) / number
+        print(f"{label:>12}: {elapsed * 1e6:6.1f} us per statement")  # noqa: WPS421
+
+
+async def throughput(
+    engine: AsyncEngine,
+    lookup: Callable[[AsyncSession, str], Awaitable[object]],
+    names: List[str],
+    workers: int,
+    seconds: float,
+) -> float:
+    """Lookups per second of a fixed number of concurrent workers."""
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)  # type: ignore
+    deadline = time.perf_counter() + seconds
+    done = 0
+
+    async def worker() -> None:  # noqa: WPS430
+        nonlocal done
+        async with session_factory() as session:
+            while time.perf_counter() < deadline:
+                await lookup(session, random.choice(names))
+                await session.rollback()
+                done += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    return done / (time.perf_counter() - started)
+
+
+async def plain_lookup(session: AsyncSession, name: str) -> object:
+    rows = await session.execute(plain_query(name))
+    return rows.scalars().first()
+
+
+async def dao_lookup(session: AsyncSession, name: str) -> object:
+    return await TransientDAO(session).get_transient(name)
+
+
+async def bench_throughput(workers: int, seconds: float) -> None:
+    baseline = create_async_engine(
+        str(settings.db_url.with_query(prepared_statement_cache_size=0)),
+        pool_size=workers,
+    )
+    tuned = create_db_engine()
+    try:
+        async with baseline.connect() as conn:
+            names = list((await conn.execute(select(ATModel.name).limit(10000))).scalars())
+        if not names:
+            print("No transients stored, load some with python -m tnsquery.bootstrap")  # noqa: WPS421
+            return
+        for label, engine, lookup in (
+            ("baseline", baseline, plain_lookup),
+            ("tuned", tuned, dao_lookup),
+        ):
+            await throughput(engine, lookup, names, workers, 1)  # Warm up pool and caches.
+            rate = await throughput(engine, lookup, names, workers, seconds)
+            print(f"{label:>12}: {rate:8.0f} lookups/s with {workers} workers")  # noqa: WPS421
+    finally:
+        await baseline.dispose()
+        await tuned.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent lookups.")
+    parser.add_argument("--seconds", type=float, default=10, help="Duration per case.")
+    parser.add_argument("--number", type=int, default=20000, help="Statements built per case.")
+    parser.add_argument("--no-db", action="store_true", help="Only run the statement part.")
+    args = parser.parse_args()
+
+    bench_statements(args.number)
+    if not args.no_db:
+        asyncio.run(bench_throughput(args.workers, args.seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Local stand-in for the TNS object API, for load tests.
+
+Answers POST /api/get/object like wis-tns.org, with a reply that
+TNSAPI.validate_response parses. Every name is found, with coordinates
+and internal names derived from the name, except a configurable fraction
+of names that are consistently reported as not found. Replies are delayed
+by a random latency and a fraction of them fail with a 500.
+
+Run it with `python benchmarks/fake_tns.py [--port 8001] [--latency 0.2]`
+and start the app with TNSQUERY_TNS_API_URL=http://127.0.0.1:8001/api/get,
+and a TNS quota high enough for the load, e.g. TNSQUERY_TNS_RATE_LIMIT=100000.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+from dataclasses import dataclass
+from typing import Any, Dict
+from urllib.parse import parse_qs
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+
+@dataclass
+class FakeTNSConfig:
+    latency: float = 0.2
+    jitter: float = 0.1
+    error_rate: float = 0.0
+    missing_rate: float = 0.1
+
+
+def name_fraction(name: str) -> float:
+    """Deterministic number in [0, 1) for a name, the same in every run."""
+    digest = hashlib.blake2b(name.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2 ** 64
+
+
+def object_reply(name: str) -> Dict[str, Any]:
+    """The reply of TNS for a found object, derived from its name."""
+    fraction = name_fraction(name)
+    return {
+        "objname": name,
+        "name_prefix": "SN",
+        "radeg": round(fraction * 360, 6),
+        "decdeg": round(name_fraction(name[::-1]) * 180 - 90, 6),
+        "redshift": round(fraction * 0.2, 4) or None,
+        "internal_names": f"ZTF{name[2:]}x, ATLAS{name[2:]}y",
+    }
+
+
+def make_app(config: FakeTNSConfig) -> Starlette:
+    """Create the fake TNS application."""
+
+    async def get_object(request: Request) -> JSONResponse:  # noqa: WPS430
+        form = parse_qs((await request.body()).decode())
+        received = json.loads(form.get("data", ["{}"])[0])
+        name = received.get("objname", "")
+        await asyncio.sleep(max(0, random.gauss(config.latency, config.jitter)))
+        if random.random() < config.error_rate:
+            return JSONResponse({"id_code": 500, "id_message": "Internal Server Error"}, 500)
+        if name_fraction(name) < config.missing_rate:
+            reply: Dict[str, Any] = {
+                "name": {"110": {"message": "No results found.", "message_id": 110}},
+            }
+        else:
+            reply = object_reply(name)
+        return JSONResponse(
+            {
+                "id_code": 200,
+                "id_message": "OK",
+                "data": {"received_data": received, "reply": reply},
+            },
+        )
+
+    return Starlette(routes=[Route("/api/get/object", get_object, methods=["POST"])])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.2, help="Mean reply delay in seconds.")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Standard deviation of the delay.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of replies failing with 500.")
+    parser.add_argument("--missing-rate", type=float, default=0.1, help="Fraction of names not found.")
+    args = parser.parse_args()
+
+    config = FakeTNSConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        missing_rate=args.missing_rate,
+    )
+    uvicorn.run(make_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
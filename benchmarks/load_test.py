@@ -0,0 +1,191 @@
+"""
+Load test of a running tnsquery, with a mix of workloads.
+
+Concurrent clients send requests for a fixed time, each request picks
+a workload at random with the given weights:
+
+- hit: GET of a transient that is stored (and maybe cached).
+- miss: GET of a name never requested before, fetched from TNS.
+- force: GET with force_tns of a stored transient.
+- patch: PATCH of the redshift of a stored transient.
+
+Run it against the fake TNS server, never the real one:
+
+    python benchmarks/fake_tns.py &
+    TNSQUERY_TNS_API_URL=http://127.0.0.1:8001/api/get \\
+    TNSQUERY_TNS_RATE_LIMIT=100000 python -m tnsquery &
+    python benchmarks/load_test.py --url http://127.0.0.1:8000 --output results.json
+
+Latency percentiles (p50, p95, p99, in ms) and requests per second are
+written as JSON, per workload and overall, together with the git commit
+and settings of the run so results can be compared between commits.
+"""
+import argparse
+import asyncio
+import json
+import random
+import string
+import subprocess  # noqa: S404
+import sys
+import time
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+WORKLOADS = ("hit", "miss", "force", "patch")
+
+
+def stored_name(index: int) -> str:
+    """IAU name of one of the transients stored before the run."""
+    suffix = ""
+    for _ in range(4):  # noqa: WPS122
+        index, letter = divmod(index, 26)
+        suffix += string.ascii_lowercase[letter]
+    return f"2098{suffix}"
+
+
+def new_name() -> str:
+    """IAU name that is very unlikely to have been requested before."""
+    suffix = "".join(random.choices(string.ascii_lowercase, k=4))
+    return f"{random.randint(2100, 2999)}{suffix}"
+
+
+def percentiles(latencies: List[float]) -> Dict[str, Optional[float]]:
+    """p50, p95 and p99 of latencies, in milliseconds."""
+    if not latencies:
+        return {"p50": None, "p95": None, "p99": None}
+    ordered = sorted(latencies)
+    return {
+        label: round(ordered[min(len(ordered) - 1, int(len(ordered) * quantile))] * 1000, 3)
+        for label, quantile in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(  # noqa: S603, S607
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def request(client: httpx.AsyncClient, workload: str, names: List[str]) -> int:
+    """Send one request of a workload, return its status code."""
+    if workload == "miss":
+        response = await client.get(f"/api/transient/{new_name()}")
+    elif workload == "force":
+        response = await client.get(
+            f"/api/transient/{random.choice(names)}",
+            params={"force_tns": "true"},
+        )
+    elif workload == "patch":
+        response = await client.patch(
+            f"/api/transient/{random.choice(names)}/redshift",
+            params={"redshift": round(random.uniform(0, 0.2), 4)},
+        )
+    else:
+        response = await client.get(f"/api/transient/{random.choice(names)}")
+    return response.status_code
+
+
+async def prepare(client: httpx.AsyncClient, stored: int, concurrency: int) -> List[str]:
+    """Make sure the transients used by hit, force and patch requests are stored."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def store(name: str) -> Optional[str]:  # noqa: WPS430
+        async with semaphore:
+            response = await client.get(f"/api/transient/{name}")
+        return name if response.status_code == 200 else None
+
+    names = await asyncio.gather(*(store(stored_name(index)) for index in range(stored)))
+    return [name for name in names if name is not None]
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    weights = [args.hit, args.miss, args.force, args.patch]
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    statuses: Dict[str, Counter] = defaultdict(Counter)
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout) as client:
+        names = await prepare(client, args.stored, args.concurrency)
+        if not names:
+            raise SystemExit("No transient could be stored, is the fake TNS server running?")
+        deadline = time.perf_counter() + args.seconds
+
+        async def worker() -> None:  # noqa: WPS430
+            while time.perf_counter() < deadline:
+                workload = random.choices(WORKLOADS, weights)[0]
+                started = time.perf_counter()
+                try:
+                    status = str(await request(client, workload, names))
+                except httpx.HTTPError as exc:
+                    status = type(exc).__name__
+                latencies[workload].append(time.perf_counter() - started)
+                statuses[workload][status] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    results: Dict[str, Any] = {}
+    for workload in (*WORKLOADS, "total"):
+        if workload == "total":
+            times = [latency for workload_times in latencies.values() for latency in workload_times]
+            counts = sum(statuses.values(), Counter())
+        else:
+            times, counts = latencies[workload], statuses[workload]
+        results[workload] = {
+            "requests": len(times),
+            "rps": round(len(times) / elapsed, 1),
+            **percentiles(times),
+            "statuses": dict(counts),
+        }
+    return {
+        "commit": git_commit(),
+        "config": {
+            "url": args.url,
+            "concurrency": args.concurrency,
+            "seconds": args.seconds,
+            "stored": len(names),
+            "weights": dict(zip(WORKLOADS, weights)),
+        },
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Base URL of the app.")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent clients.")
+    parser.add_argument("--seconds", type=float, default=30, help="Duration of the run.")
+    parser.add_argument("--timeout", type=float, default=30, help="Request timeout in seconds.")
+    parser.add_argument("--stored", type=int, default=1000, help="Transients stored before the run.")
+    parser.add_argument("--hit", type=float, default=80, help="Weight of stored lookups.")
+    parser.add_argument("--miss", type=float, default=10, help="Weight of new lookups.")
+    parser.add_argument("--force", type=float, default=5, help="Weight of force_tns lookups.")
+    parser.add_argument("--patch", type=float, default=5, help="Weight of redshift updates.")
+    parser.add_argument("--output", help="Write the JSON results to this file instead of stdout.")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    for workload, result in report["results"].items():
+        print(  # noqa: WPS421
+            f"{workload:>6}: {result['rps']:8.1f} req/s  p50 {result['p50']} ms  "
+            f"p95 {result['p95']} ms  p99 {result['p99']} ms  {result['statuses']}",
+            file=sys.stderr,
+        )
+    encoded = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(encoded)
+    else:
+        print(encoded)  # noqa: WPS421
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Micro-benchmark of the JSON encoding of transient responses.
+
+Compares the previous path (ATModel -> validated Transient -> FastAPI
+response validation and jsonable_encoder -> UJSONResponse) with the
+current one (ATModel -> plain dict -> UJSONResponse).
+
+Run it with `python benchmarks/serialization.py [--number 2000]`.
+"""
+import argparse
+import asyncio
+import time
+from typing import Any, Callable, List
+
+from fastapi.responses import UJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from tnsquery.db.models.transient_model import ATModel, Transient
+from tnsquery.web.api.transient.schema import TransientPage
+
+
+def make_rows(count: int) -> List[ATModel]:
+    return [
+        ATModel(id=index, name=f"2022a{index}", redshift=0.05, ra=10.5, dec=-20.25, ebv=0.03)
+        for index in range(count)
+    ]
+
+
+def timeit(func: Callable[[], Any], number: int) -> float:
+    started = time.perf_counter()
+    for _ in range(number):
+        func()
+    return (time.perf_counter() - started) / number
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", type=int, default=2000, help="Repetitions per case.")
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    single_field = create_response_field(name="single", type_=Transient)
+    page_field = create_response_field(name="page", type_=TransientPage)
+
+    def validated(field: Any, content: Any) -> bytes:
+        return UJSONResponse(
+            loop.run_until_complete(
+                serialize_response(field=field, response_content=content, is_coroutine=True),
+            ),
+        ).body
+
+    for count in (1, 100, 1000):
+        rows = make_rows(count)
+        if count == 1:
+            before = timeit(lambda: validated(single_field, rows[0].as_transient()), args.number)
+            after = timeit(lambda: UJSONResponse(rows[0].as_dict()).body, args.number)
+        else:
+            number = max(args.number // count, 10)
+            before = timeit(
+                lambda: validated(
+                    page_field,
+                    {"items": [at.as_transient() for at in rows], "next_cursor": None},
+                ),
+                number,
+            )
+            after = timeit(
+                lambda: UJSONResponse(
+                    {"items": [at.as_dict() for at in rows], "next_cursor": None},
+                ).body,
+                number,
+            )
+        print(  # noqa: WPS421
+            f"{count:>5} transients: validated {before * 1e6:9.1f} us,"
+            f" direct {after * 1e6:9.1f} us, {before / after:5.1f}x faster",
+        )
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
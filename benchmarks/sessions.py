@@ -0,0 +1,93 @@
+"""
+Benchmark of the per-request database session handling.
+
+Every request used to open a session, commit it and close it. Lookups
+therefore ran inside BEGIN ... COMMIT, three round trips for one query.
+Read-only requests now use an autocommit session that is only closed,
+so a lookup is a single round trip.
+
+Each worker handles requests one after the other with a fresh session,
+as the API does, and looks up random stored transients. This needs the
+database from settings, filled with some transients.
+
+Run it with `python benchmarks/sessions.py [--workers 8] [--seconds 10]`.
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import List
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from tnsquery.db.dao.transient_dao import TransientDAO
+from tnsquery.db.models.transient_model import ATModel
+from tnsquery.db.utils import create_db_engine
+
+
+async def requests_per_second(
+    session_factory: sessionmaker,
+    commit: bool,
+    names: List[str],
+    workers: int,
+    seconds: float,
+) -> float:
+    """Requests per second of a fixed number of concurrent workers."""
+    deadline = time.perf_counter() + seconds
+    done = 0
+
+    async def worker() -> None:  # noqa: WPS430
+        nonlocal done
+        while time.perf_counter() < deadline:
+            session: AsyncSession = session_factory()
+            try:  # noqa: WPS501
+                await TransientDAO(session).get_transient(random.choice(names))
+            finally:
+                if commit:
+                    await session.commit()
+                await session.close()
+            done += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    return done / (time.perf_counter() - started)
+
+
+async def bench(workers: int, seconds: float) -> None:
+    engine = create_db_engine()
+    read_write = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)  # type: ignore
+    read_only = sessionmaker(
+        engine.execution_options(isolation_level="AUTOCOMMIT"),
+        class_=AsyncSession,  # type: ignore
+        expire_on_commit=False,
+    )
+    try:
+        async with engine.connect() as conn:
+            names = list((await conn.execute(select(ATModel.name).limit(10000))).scalars())
+        if not names:
+            print("No transients stored, load some with python -m tnsquery.bootstrap")  # noqa: WPS421
+            return
+        for label, session_factory, commit in (
+            ("commit", read_write, True),
+            ("read-only", read_only, False),
+        ):
+            await requests_per_second(session_factory, commit, names, workers, 1)  # Warm up.
+            rate = await requests_per_second(session_factory, commit, names, workers, seconds)
+            print(f"{label:>12}: {rate:8.0f} requests/s with {workers} workers")  # noqa: WPS421
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent requests.")
+    parser.add_argument("--seconds", type=float, default=10, help="Duration per case.")
+    args = parser.parse_args()
+
+    asyncio.run(bench(args.workers, args.seconds))
+
+
+if __name__ == "__main__":
+    main()
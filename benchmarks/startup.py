@@ -0,0 +1,98 @@
+"""
+Benchmark of the cold start of a worker.
+
+Measures, in fresh interpreters, the time to import the application and
+the time from starting a uvicorn worker to its first served request,
+which includes the startup hook. The first part runs without a database,
+the second needs the database from settings, migrated to the latest revision.
+
+Run it with `python benchmarks/startup.py [--runs 5] [--no-db]`.
+"""
+import argparse
+import statistics
+import subprocess  # noqa: S404
+import sys
+import time
+from typing import List, Optional
+
+import httpx
+
+IMPORT_APP = (
+    "import time; started = time.perf_counter(); "
+    "import tnsquery.web.application; print(time.perf_counter() - started)"
+)
+
+
+def import_time() -> float:
+    """Seconds to import the application in a fresh interpreter."""
+    output = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", IMPORT_APP],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return float(output.stdout)
+
+
+def first_request_time(port: int, timeout: float) -> Optional[float]:
+    """Seconds from starting a worker to its first answered request, None if it failed."""
+    started = time.perf_counter()
+    worker = subprocess.Popen(  # noqa: S603
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "tnsquery.web.application:get_app",
+            "--factory",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if worker.poll() is not None:
+                return None
+            try:
+                httpx.get(f"http://127.0.0.1:{port}/api/health", timeout=1)
+            except httpx.TransportError:
+                time.sleep(0.005)
+                continue
+            return time.perf_counter() - started
+        return None
+    finally:
+        worker.terminate()
+        worker.wait()
+
+
+def report(label: str, times: List[float]) -> None:
+    print(  # noqa: WPS421
+        f"{label:>14}: median {statistics.median(times) * 1000:7.1f} ms, "
+        f"min {min(times) * 1000:7.1f} ms over {len(times)} runs",
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes per case.")
+    parser.add_argument("--port", type=int, default=8765, help="Port of the started worker.")
+    parser.add_argument("--timeout", type=float, default=60, help="Longest wait for a worker.")
+    parser.add_argument("--no-db", action="store_true", help="Only measure the import time.")
+    args = parser.parse_args()
+
+    report("import", [import_time() for _ in range(args.runs)])
+    if args.no_db:
+        return
+    times = []
+    for _ in range(args.runs):
+        elapsed = first_request_time(args.port, args.timeout)
+        if elapsed is None:
+            raise SystemExit("The worker did not start, is the database up and migrated?")
+        times.append(elapsed)
+    report("first request", times)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Fill in the E(B-V) of stored transients that do not have one.
+
+Rows are read in keyset-paginated chunks, the E(B-V) of each chunk is looked
+up in the local SFD dust map with one vectorized call in a pool of worker
+processes, and written back with one `UPDATE ... FROM (VALUES ...)` per chunk.
+Only rows still missing E(B-V) are read, so an interrupted run resumes where
+it stopped when started again.
+
+Run it with `python -m tnsquery.backfill [--chunk-size 5000] [--workers 4]`.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from tnsquery.db.dao.transient_dao import TransientDAO
+from tnsquery.db.utils import create_db_engine
+from tnsquery.services.dust import SFDMap
+from tnsquery.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Dust map of a worker process, opened once by _open_dust_map.
+_dust_map: Optional[SFDMap] = None
+
+
+def _open_dust_map(directory: Path, scale: float) -> None:
+    global _dust_map  # noqa: WPS420
+    _dust_map = SFDMap(directory, scale=scale)  # noqa: WPS442
+
+
+def _compute_ebv(ra: np.ndarray, dec: np.ndarray) -> np.ndarray:
+    assert _dust_map is not None  # noqa: S101
+    return _dust_map.ebv(ra, dec)
+
+
+async def backfill_ebv(  # noqa: WPS210
+    dust_map_dir: Path,
+    chunk_size: int,
+    workers: int,
+) -> int:
+    """
+    Set the E(B-V) of every stored transient that has none.
+
+    Up to `workers` chunks are computed and written concurrently
+    while the next chunk is read.
+
+    :param dust_map_dir: directory with the SFD dust map files.
+    :param chunk_size: transients read and written per statement.
+    :param workers: number of worker processes.
+    :return: number of transients updated.
+    """
+    engine = create_db_engine()
+    session_factory = sessionmaker(
+        engine,
+        expire_on_commit=False,
+        class_=AsyncSession,  # type: ignore
+        future=True,
+    )
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_open_dust_map,
+        initargs=(dust_map_dir, settings.dust_map_scale),
+    )
+    loop = asyncio.get_running_loop()
+
+    async def fill(positions: list[tuple[int, float, float]]) -> int:  # noqa: WPS430
+        ids, ra, dec = (np.asarray(column) for column in zip(*positions))
+        ebv = await loop.run_in_executor(pool, _compute_ebv, ra, dec)
+        async with session_factory() as session:
+            async with session.begin():
+                await TransientDAO(session).set_ebvs(dict(zip(ids.tolist(), ebv.tolist())))
+        return len(positions)
+
+    updated = 0
+    after_id = 0
+    started = time.perf_counter()
+    pending: set["asyncio.Task[int]"] = set()
+    try:
+        while True:  # noqa: WPS457
+            async with session_factory() as session:
+                positions = await TransientDAO(session).get_missing_ebv(chunk_size, after_id)
+            if not positions:
+                break
+            after_id = positions[-1][0]
+            pending.add(asyncio.create_task(fill(positions)))
+            if len(pending) < workers:
+                continue
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            updated += sum(task.result() for task in done)
+            elapsed = time.perf_counter() - started
+            logger.info("%d rows updated, %.0f rows/s", updated, updated / elapsed)
+        if pending:
+            done, pending = await asyncio.wait(pending)
+            updated += sum(task.result() for task in done)
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        pool.shutdown(cancel_futures=True)
+        await engine.dispose()
+    return updated
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """
+    Entrypoint of the backfill command.
+
+    :param argv: command line arguments.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=5000,
+        help="Transients read and updated per statement.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes computing E(B-V), defaults to the number of cores.",
+    )
+    args = parser.parse_args(argv)
+    if settings.dust_map_dir is None:
+        parser.error("TNSQUERY_DUST_MAP_DIR is not set.")
+    logging.basicConfig(
+        level=settings.log_level.value,
+        format="%(asctime)s %(levelname)s %(message)s",
+    )
+    started = time.perf_counter()
+    updated = asyncio.run(
+        backfill_ebv(settings.dust_map_dir, args.chunk_size, max(args.workers, 1)),
+    )
+    elapsed = time.perf_counter() - started
+    logger.info("Updated %d rows in %.1fs, %.0f rows/s", updated, elapsed, updated / elapsed)
+
+
+if __name__ == "__main__":
+    main()
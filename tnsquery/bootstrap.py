@@ -0,0 +1,135 @@
+"""
+Fill the database from the TNS public objects CSV file.
+
+Loading every object with one TNS API request each would take weeks under
+the TNS quota, instead the daily dump of all public objects is downloaded
+once and loaded in chunks with multi-row upserts.
+
+Run it with `python -m tnsquery.bootstrap [--file tns_public_objects.csv.zip]`.
+"""
+import argparse
+import asyncio
+import logging
+import time
+from pathlib import Path
+from typing import Optional, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from tnsquery.db.dao.transient_dao import TransientDAO
+from tnsquery.db.utils import create_db_engine
+from tnsquery.services.tns import create_dust_map, create_tns_api
+from tnsquery.services.tns_objects import PublicObjectsChunk, iter_public_object_chunks
+from tnsquery.settings import TEMP_DIR, settings
+
+logger = logging.getLogger(__name__)
+
+
+async def download_public_objects(path: Path) -> Path:
+    """
+    Download the current TNS public objects file.
+
+    :param path: destination file.
+    :return: destination file.
+    """
+    logger.info("Downloading TNS public objects to %s", path)
+    async with create_tns_api() as tns:
+        return await tns.download_public_objects(path)
+
+
+async def load_public_objects(path: Path, chunk_size: int) -> int:
+    """
+    Upsert every object of a public objects file into the database.
+
+    The next chunk is parsed in a thread while the previous one is written.
+
+    :param path: tns_public_objects CSV file or its zip archive.
+    :param chunk_size: objects written per statement.
+    :return: number of objects loaded.
+    """
+    engine = create_db_engine()
+    session_factory = sessionmaker(
+        engine,
+        expire_on_commit=False,
+        class_=AsyncSession,  # type: ignore
+        future=True,
+    )
+
+    async def write(chunk: PublicObjectsChunk) -> None:  # noqa: WPS430
+        async with session_factory() as session:
+            async with session.begin():
+                dao = TransientDAO(session)
+                await dao.upsert_transients(chunk.transients, returning=False)
+                await dao.add_aliases(chunk.aliases)
+
+    chunks = iter_public_object_chunks(path, chunk_size, dust_map=create_dust_map())
+    loaded = 0
+    started = time.perf_counter()
+    pending: Optional["asyncio.Task[None]"] = None
+    try:
+        while True:  # noqa: WPS457
+            chunk = await asyncio.to_thread(next, chunks, None)
+            if pending is not None:
+                await pending
+                elapsed = time.perf_counter() - started
+                logger.info("%d objects loaded, %.0f objects/s", loaded, loaded / elapsed)
+            if chunk is None:
+                break
+            pending = asyncio.create_task(write(chunk))
+            loaded += len(chunk.transients)
+    finally:
+        if pending is not None and not pending.done():
+            pending.cancel()
+        await engine.dispose()
+    return loaded
+
+
+async def bootstrap(path: Optional[Path], chunk_size: int) -> int:
+    """
+    Load the TNS public objects, downloading them if no file is given.
+
+    :param path: local copy of the public objects file, if any.
+    :param chunk_size: objects written per statement.
+    :return: number of objects loaded.
+    """
+    downloaded = path is None
+    if path is None:
+        path = await download_public_objects(TEMP_DIR / "tns_public_objects.csv.zip")
+    try:
+        return await load_public_objects(path, chunk_size)
+    finally:
+        if downloaded:
+            path.unlink(missing_ok=True)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """
+    Entrypoint of the bootstrap command.
+
+    :param argv: command line arguments.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--file",
+        type=Path,
+        help="Local tns_public_objects.csv or .csv.zip, downloaded from TNS if omitted.",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=2000,
+        help="Objects written per statement.",
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=settings.log_level.value,
+        format="%(asctime)s %(levelname)s %(message)s",
+    )
+    started = time.perf_counter()
+    loaded = asyncio.run(bootstrap(args.file, args.chunk_size))
+    logger.info("Loaded %d objects in %.1fs", loaded, time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,21 @@
-from typing import Any, AsyncGenerator
+import asyncio
+import json
+from datetime import timedelta
+from typing import Any, AsyncGenerator, Optional
+from urllib.parse import parse_qs
 
 import pytest
 from fastapi import FastAPI
-from httpx import AsyncClient
+from httpx import AsyncClient, MockTransport, Request, Response
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
-from tnsquery.db.dependencies import get_db_session
+from tnsquery.db.dependencies import get_db_read_session, get_db_session
 from tnsquery.db.utils import create_database, drop_database
+from tnsquery.services.cache import TransientCache, TTLCache
+from tnsquery.services.refresh import TransientRefresher
+from tnsquery.services.singleflight import SingleFlight
+from tnsquery.services.tns import TNSAPI, TNSBot
 from tnsquery.settings import settings
 from tnsquery.web.application import get_app
 
@@ -78,17 +86,135 @@ async def dbsession(
         await connection.close()
 
 
+class FakeClock:
+    """Manually advanced timer."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    """
+    Timer for the services taking one, advanced by setting its now.
+
+    :return: fake clock.
+    """
+    return FakeClock()
+
+
+class FakeTNS:
+    """TNS object API answering from a dict of known objects."""
+
+    def __init__(self) -> None:
+        self.objects: dict[str, dict[str, Any]] = {}
+        self.requests: list[str] = []
+        self.delay = 0.0
+
+    def add(
+        self,
+        name: str,
+        redshift: Optional[float] = 0.1,
+        ra: float = 10.0,
+        dec: float = 20.0,
+        internal_names: str = "",
+    ) -> None:
+        """
+        Make TNS know an object.
+
+        :param name: IAU name without prefix.
+        :param redshift: redshift, None if TNS has none.
+        :param ra: right ascension in degrees.
+        :param dec: declination in degrees.
+        :param internal_names: comma separated survey names.
+        """
+        self.objects[name] = {
+            "objname": name,
+            "redshift": redshift,
+            "radeg": ra,
+            "decdeg": dec,
+            "internal_names": internal_names,
+        }
+
+    async def handle(self, request: Request) -> Response:
+        """
+        Answer an object request like TNS.
+
+        :param request: object request.
+        :return: the object, or the TNS not found reply.
+        """
+        name = json.loads(parse_qs(request.content.decode())["data"][0])["objname"]
+        self.requests.append(name)
+        await asyncio.sleep(self.delay)
+        reply = self.objects.get(name, {"name": {"110": {"message": "No results found."}}})
+        return Response(200, json={"data": {"reply": dict(reply)}})
+
+    def api(self) -> TNSAPI:
+        """
+        Create a TNS API client talking to this fake.
+
+        :return: TNS API client without rate limit and circuit breaker.
+        """
+        handler = self.handle
+
+        class MockClient(AsyncClient):  # noqa: WPS431
+            def __init__(self, **client_kwargs: Any) -> None:
+                super().__init__(transport=MockTransport(handler), **client_kwargs)
+
+        return TNSAPI(bot=TNSBot(), client_type=MockClient, retry_backoff=0)
+
+
+@pytest.fixture
+def fake_tns(monkeypatch: pytest.MonkeyPatch) -> FakeTNS:
+    """
+    Fake TNS used by the application instead of the real one.
+
+    :param monkeypatch: pytest monkeypatch.
+    :return: fake TNS.
+    """
+    monkeypatch.setenv("TNS_API_KEY", "key")
+    return FakeTNS()
+
+
 @pytest.fixture
 def fastapi_app(
     dbsession: AsyncSession,
+    _engine: AsyncEngine,
+    fake_tns: FakeTNS,
 ) -> FastAPI:
     """
     Fixture for creating FastAPI app.
 
+    The services created on startup are set up without
+    background tasks, and TNS is replaced by fake_tns.
+
     :return: fastapi app with mocked dependencies.
     """
     application = get_app()
     application.dependency_overrides[get_db_session] = lambda: dbsession
+    application.dependency_overrides[get_db_read_session] = lambda: dbsession
+    state = application.state
+    state.db_engine = _engine
+    state.dust_map = None
+    state.tns_api = fake_tns.api()
+    state.tns_single_flight = SingleFlight()
+    state.transient_cache = TransientCache(maxsize=settings.cache_size, ttl=settings.cache_ttl)
+    state.negative_cache = TTLCache(
+        maxsize=settings.negative_cache_size,
+        ttl=settings.negative_cache_ttl,
+    )
+    state.transient_refresher = TransientRefresher(
+        engine=_engine,
+        tns=state.tns_api,
+        flight=state.tns_single_flight,
+        cache=state.transient_cache,
+        max_age=timedelta(seconds=settings.refresh_after),
+    )
+    state.write_behind = None
+    state.cache_invalidator = None
     return application  # noqa: WPS331
 
 
@@ -1,2 +1,4 @@
 """DAO classes."""
 from .transient_dao import TransientDAO
+from .sync_checkpoint_dao import SyncCheckpointDAO
+from .missing_transient_dao import MissingTransientDAO
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+from fastapi import Depends
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from tnsquery.db.dependencies import get_db_read_session, get_db_session
+from tnsquery.db.models.missing_transient_model import MissingTransientModel
+
+
+class MissingTransientDAO:
+    """Class for accessing the table of names TNS does not know."""
+
+    def __init__(self, session: AsyncSession = Depends(get_db_session)):
+        self.session = session
+
+    @classmethod
+    def read_only(
+        cls,
+        session: AsyncSession = Depends(get_db_read_session),
+    ) -> "MissingTransientDAO":
+        """
+        Dependency for a DAO that only reads, on an autocommit session.
+
+        :param session: read-only database session.
+        :return: missing transient DAO.
+        """
+        return cls(session)
+
+    async def get_missing(self, names: list[str], ttl: timedelta) -> set[str]:
+        """
+        Get the names TNS reported as not found within ttl.
+
+        :param names: normalized names.
+        :param ttl: how long a not found result is trusted.
+        :return: the names that are known to be missing.
+        """
+        if not names:
+            return set()
+        query = select(MissingTransientModel.name).where(
+            MissingTransientModel.name.in_(names),
+            MissingTransientModel.checked_at > datetime.utcnow() - ttl,
+        )
+        rows = await self.session.execute(query)
+        return set(rows.scalars())
+
+    async def add_missing(self, names: list[str]) -> None:
+        """
+        Remember that TNS does not know names, as of now.
+
+        :param names: normalized names.
+        """
+        if not names:
+            return
+        now = datetime.utcnow()
+        query = pg_insert(MissingTransientModel).values(
+            [{"name": name, "checked_at": now} for name in dict.fromkeys(names)],
+        )
+        query = query.on_conflict_do_update(
+            index_elements=["name"],
+            set_={"checked_at": query.excluded.checked_at},
+        )
+        await self.session.execute(query)
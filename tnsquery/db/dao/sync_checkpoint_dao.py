@@ -0,0 +1,43 @@
+from datetime import datetime
+from typing import Optional
+
+from fastapi import Depends
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from tnsquery.db.dependencies import get_db_session
+from tnsquery.db.models.sync_checkpoint_model import SyncCheckpointModel
+
+
+class SyncCheckpointDAO:
+    """Class for accessing sync checkpoints table."""
+
+    def __init__(self, session: AsyncSession = Depends(get_db_session)):
+        self.session = session
+
+    async def get_checkpoint(self, name: str) -> Optional[datetime]:
+        """
+        Get the checkpoint of a job.
+
+        :param name: name of the job.
+        :return: checkpoint, None if the job never ran.
+        """
+        query = select(SyncCheckpointModel.value).filter_by(name=name)
+        rows = await self.session.execute(query)
+        checkpoint: Optional[datetime] = rows.scalar_one_or_none()
+        return checkpoint
+
+    async def set_checkpoint(self, name: str, value: datetime) -> None:
+        """
+        Store the checkpoint of a job.
+
+        :param name: name of the job.
+        :param value: new checkpoint.
+        """
+        query = pg_insert(SyncCheckpointModel).values(name=name, value=value)
+        query = query.on_conflict_do_update(
+            index_elements=["name"],
+            set_={"value": query.excluded.value},
+        )
+        await self.session.execute(query)
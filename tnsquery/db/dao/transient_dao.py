@@ -1,12 +1,18 @@
-from lib2to3.pgen2.token import AT
-from typing import List, Optional
+from datetime import datetime
+from typing import Any, AsyncIterator, Iterable, List, Mapping, Optional, Sequence
 
 from fastapi import Depends
-from sqlalchemy import select, insert, delete, update, cast, Float, String, Integer
+from sqlalchemy import select, insert, delete, update, case, cast, column, func, lambda_stmt, or_, values, Float, String, Integer
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from tnsquery.db.dependencies import get_db_session
+from tnsquery.db.dependencies import get_db_read_session, get_db_session
+from tnsquery.db.models.transient_alias_model import TransientAliasModel
 from tnsquery.db.models.transient_model import ATModel, Transient
+from tnsquery.db.names import is_iau_name, normalize_name
+from tnsquery.db.notifications import CHANNEL, encode
+from tnsquery.db.spatial import angular_separation, cone_ra_ranges, cone_zones
+from tnsquery.settings import settings
 
 
 class TransientDAO:
@@ -15,6 +21,19 @@ class TransientDAO:
     def __init__(self, session: AsyncSession = Depends(get_db_session)):
         self.session = session
 
+    @classmethod
+    def read_only(
+        cls,
+        session: AsyncSession = Depends(get_db_read_session),
+    ) -> "TransientDAO":
+        """
+        Dependency for a DAO that only reads, on an autocommit session.
+
+        :param session: read-only database session.
+        :return: transient DAO.
+        """
+        return cls(session)
+
     async def create_transient_model(self, transient: Transient) -> ATModel:
         """
         Add single transient to session.
@@ -25,6 +44,104 @@ class TransientDAO:
         self.session.add(at)
         return at
 
+    async def upsert_transient(self, transient: Transient) -> ATModel:
+        """
+        Insert a transient or update the stored one, in a single round trip.
+
+        :param transient: transient to write.
+        :return: stored transient model.
+        """
+        upserted = await self.upsert_transients([transient])
+        return upserted[0]
+
+    async def upsert_transients(
+        self,
+        transients: Sequence[Transient],
+        returning: bool = True,
+    ) -> List[ATModel]:
+        """
+        Insert transients or update stored ones, with a single statement.
+
+        Stored rows get the TNS data (redshift and coordinates) of the new
+        transients, except a redshift set by hand, and their ebv is only set
+        if it was missing. fetched_at is
+        set to now, the transients are expected to come from TNS. This is one
+        INSERT ... ON CONFLICT (name) DO UPDATE ... RETURNING round trip,
+        so there is no read-modify-write and no unique constraint violation
+        when the same name is written concurrently.
+
+        :param transients: transients to write.
+        :param returning: whether to return the stored rows.
+        :return: stored transient models, empty if returning is False.
+        """
+        fetched_at = datetime.utcnow()
+        rows = {
+            transient.name: {
+                **ATModel.row_from_transient(transient),
+                "fetched_at": fetched_at,
+            }
+            for transient in transients
+        }
+        if not rows:
+            return []
+        query = pg_insert(ATModel).values(list(rows.values()))
+        query = query.on_conflict_do_update(
+            index_elements=["name"],
+            set_={
+                **{
+                    column: query.excluded[column]
+                    for column in ("ra", "dec", "zone", "fetched_at")
+                },
+                "redshift": case(
+                    (ATModel.redshift_manual, ATModel.redshift),
+                    else_=query.excluded.redshift,
+                ),
+                "ebv": func.coalesce(func.nullif(ATModel.ebv, 0), query.excluded.ebv),
+            },
+        )
+        await self.notify_changed(rows)
+        if not returning:
+            await self.session.execute(query)
+            return []
+        orm_query = (
+            select(ATModel)
+            .from_statement(query.returning(ATModel))
+            .execution_options(populate_existing=True)
+        )
+        upserted = await self.session.execute(orm_query)
+        transient_models: List[ATModel] = upserted.scalars().fetchall()
+        return transient_models
+
+    async def add_aliases(self, aliases: Mapping[str, Iterable[str]]) -> None:
+        """
+        Store survey internal names of transients, with a single statement.
+
+        Aliases that are already stored are left untouched.
+
+        :param aliases: internal names keyed by the IAU name of their transient.
+        """
+        rows = {}
+        for name, internal_names in aliases.items():
+            for internal_name in internal_names:
+                alias = normalize_name(internal_name)
+                if not is_iau_name(alias):
+                    rows[alias] = name
+        if not rows:
+            return
+        new_aliases = values(
+            column("alias", String),
+            column("name", String),
+            name="new_aliases",
+        ).data(list(rows.items()))
+        query = pg_insert(TransientAliasModel).from_select(
+            ["alias", "transient_id"],
+            select(new_aliases.c.alias, ATModel.id).join(
+                ATModel,
+                ATModel.name == new_aliases.c.name,
+            ),
+        )
+        await self.session.execute(query.on_conflict_do_nothing(index_elements=["alias"]))
+
     async def get_all_transients(self, limit: int, offset: int) -> List[ATModel]:
         """
         Get all transient models with limit/offset pagination.
@@ -40,6 +157,116 @@ class TransientDAO:
         transients: List[ATModel] = raw_transients.scalars().fetchall()
         return transients
 
+    async def get_transients_after(self, limit: int, after_id: int = 0) -> List[ATModel]:
+        """
+        Get transient models with keyset pagination on id.
+
+        Unlike limit/offset, every page costs the same
+        however deep into the table it is.
+
+        :param limit: limit of transients.
+        :param after_id: id of the last transient of the previous page.
+        :return: transients ordered by id.
+        """
+        raw_transients = await self.session.execute(
+            lambda_stmt(
+                lambda: select(ATModel)
+                .where(ATModel.id > after_id)
+                .order_by(ATModel.id)
+                .limit(limit),
+            ),
+        )
+        transients: List[ATModel] = raw_transients.scalars().fetchall()
+        return transients
+
+    async def get_missing_ebv(
+        self,
+        limit: int,
+        after_id: int = 0,
+    ) -> List[tuple[int, float, float]]:
+        """
+        Get positions of transients without E(B-V), with keyset pagination on id.
+
+        :param limit: limit of transients.
+        :param after_id: id of the last transient of the previous page.
+        :return: id, ra and dec of transients, ordered by id.
+        """
+        raw_positions = await self.session.execute(
+            select(ATModel.id, ATModel.ra, ATModel.dec)
+            .where(
+                ATModel.id > after_id,
+                or_(ATModel.ebv == 0, ATModel.ebv.is_(None)),
+                ATModel.ra.is_not(None),
+                ATModel.dec.is_not(None),
+            )
+            .order_by(ATModel.id)
+            .limit(limit),
+        )
+        return [tuple(row) for row in raw_positions]
+
+    async def set_ebvs(self, ebvs: Mapping[int, float]) -> None:
+        """
+        Set the E(B-V) of many transients, with a single statement.
+
+        :param ebvs: E(B-V) keyed by transient id.
+        """
+        if not ebvs:
+            return
+        new_ebvs = values(
+            column("id", Integer),
+            column("ebv", Float),
+            name="new_ebvs",
+        ).data(list(ebvs.items()))
+        query = (
+            update(ATModel)
+            .where(ATModel.id == new_ebvs.c.id)
+            .values(ebv=new_ebvs.c.ebv)
+            .returning(ATModel.name)
+            .execution_options(synchronize_session=False)
+        )
+        updated = await self.session.execute(query)
+        await self.notify_changed(updated.scalars().all())
+
+    async def notify_changed(self, names: Iterable[str]) -> None:
+        """
+        Tell the other workers that transients changed.
+
+        Notifications are sent when the transaction commits,
+        and not at all if it is rolled back.
+
+        :param names: canonical names of changed transients.
+        """
+        if not settings.cache_invalidation:
+            return
+        for payload in encode(names):
+            await self.session.execute(select(func.pg_notify(CHANNEL, payload)))
+
+    async def stream_transients(
+        self,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[List[dict[str, Any]]]:
+        """
+        Stream every transient through a server-side cursor.
+
+        Plain rows are fetched instead of models, only one
+        batch of them is held in memory at a time.
+
+        :param batch_size: rows fetched per round trip.
+        :yield: batches of transient rows ordered by id.
+        """
+        query = select(
+            ATModel.name,
+            ATModel.redshift,
+            ATModel.ra,
+            ATModel.dec,
+            ATModel.ebv,
+        ).order_by(ATModel.id)
+        result = await self.session.stream(
+            query.execution_options(yield_per=batch_size),
+        )
+        async for partition in result.mappings().partitions(batch_size):
+            yield [dict(row) for row in partition]
+
     async def get_transient(
         self,
         name: str,
@@ -47,14 +274,91 @@ class TransientDAO:
         """
         Get specific transient model.
 
-        :param name: name of transient instance.
+        IAU names are looked up in any spelling, survey internal
+        names are resolved to their transient through the alias table.
+        This is the hottest query, its statements are lambdas that are
+        built and compiled once and then only get the new name bound.
+
+        :param name: name or alias of transient instance.
         :return: transient models.
         """
-        query = select(ATModel).filter_by(name=name)
+        key = normalize_name(name)
+        if is_iau_name(key):
+            query = lambda_stmt(lambda: select(ATModel).where(ATModel.name == key))
+        else:
+            query = lambda_stmt(
+                lambda: select(ATModel)
+                .join(TransientAliasModel, TransientAliasModel.transient_id == ATModel.id)
+                .where(TransientAliasModel.alias == key),
+            )
         rows = await self.session.execute(query)
-        one: Optional[ATModel] = rows.scalar_one_or_none()
+        one: Optional[ATModel] = rows.scalars().first()
         return one
 
+    async def get_transients(self, names: Sequence[str]) -> dict[str, ATModel]:
+        """
+        Get all stored transients out of a list of names or aliases.
+
+        Uses one query for IAU names and one indexed join for aliases.
+
+        :param names: names or aliases of transient instances.
+        :return: transient models found, keyed by the given name.
+        """
+        keys = {name: normalize_name(name) for name in names}
+        iau_names = [key for key in keys.values() if is_iau_name(key)]
+        aliases = [key for key in keys.values() if not is_iau_name(key)]
+
+        found: dict[str, ATModel] = {}
+        if iau_names:
+            rows = await self.session.execute(self._lookup_query(iau_names))
+            found.update((at.name, at) for at in rows.scalars())
+        if aliases:
+            rows = await self.session.execute(
+                self._lookup_query(aliases).add_columns(TransientAliasModel.alias),
+            )
+            found.update((alias, at) for at, alias in rows)
+        return {name: found[key] for name, key in keys.items() if key in found}
+
+    async def cone_search(
+        self,
+        ra: float,
+        dec: float,
+        radius: float,
+        limit: int,
+    ) -> List[ATModel]:
+        """
+        Get transients within radius of a position, closest first.
+
+        Candidates are selected with range scans of the (zone, ra) index,
+        then filtered by their exact angular distance.
+
+        :param ra: right ascension of the center in degrees.
+        :param dec: declination of the center in degrees.
+        :param radius: search radius in degrees.
+        :param limit: maximum number of transients returned.
+        :return: transient models ordered by distance.
+        """
+        query = select(ATModel).where(
+            ATModel.zone.in_(cone_zones(dec, radius)),
+            or_(
+                *(
+                    ATModel.ra.between(low, high)
+                    for low, high in cone_ra_ranges(ra, dec, radius)
+                ),
+            ),
+            ATModel.dec.between(dec - radius, dec + radius),
+        )
+        rows = await self.session.execute(query)
+        candidates = (
+            (angular_separation(ra, dec, at.ra, at.dec), at)
+            for at in rows.scalars()
+        )
+        matches = sorted(
+            (match for match in candidates if match[0] <= radius),
+            key=lambda match: match[0],
+        )
+        return [at for _, at in matches[:limit]]
+
     async def delete(self, name: str) -> None:
         """
         Delete transient model.
@@ -72,4 +376,19 @@ class TransientDAO:
         :paramvalue: value of updated parameter.
         """
         setattr(model, paramname, paramvalue)
-        
+
+    @staticmethod
+    def _lookup_query(keys: Sequence[str]) -> Any:
+        """
+        Query transients by normalized names, all IAU names or all aliases.
+
+        :param keys: normalized names.
+        :return: select query.
+        """
+        if is_iau_name(keys[0]):
+            return select(ATModel).where(ATModel.name.in_(keys))
+        return (
+            select(ATModel)
+            .join(TransientAliasModel, TransientAliasModel.transient_id == ATModel.id)
+            .where(TransientAliasModel.alias.in_(keys))
+        )
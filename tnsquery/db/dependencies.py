@@ -6,7 +6,11 @@ from starlette.requests import Request
 
 async def get_db_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
     """
-    Create and get database session.
+    Create and get a read-write database session.
+
+    Sessions are lazy, no connection is checked out of the pool
+    until the first query. The transaction is committed at the end
+    of the request only if one was started.
 
     :param request: current request.
     :yield: database session.
@@ -16,5 +20,25 @@ async def get_db_session(request: Request) -> AsyncGenerator[AsyncSession, None]
     try:  # noqa: WPS501
         yield session
     finally:
-        await session.commit()
+        if session.in_transaction():
+            await session.commit()
+        await session.close()
+
+
+async def get_db_read_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Create and get a read-only database session.
+
+    The session runs in autocommit mode, so queries are sent without
+    BEGIN and COMMIT round trips and nothing is ever committed.
+    Like read-write sessions, it only connects on the first query.
+
+    :param request: current request.
+    :yield: database session.
+    """
+    session: AsyncSession = request.app.state.db_read_session_factory()
+
+    try:  # noqa: WPS501
+        yield session
+    finally:
         await session.close()
@@ -0,0 +1,55 @@
+"""transients table with declination zone index
+
+The transients table used to be created by create_all on startup,
+so it may or may not exist when this migration runs.
+
+Revision ID: 3c1f0b6e2a7d
+Revises: 94a258f7a619
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "3c1f0b6e2a7d"
+down_revision = "94a258f7a619"
+branch_labels = None
+depends_on = None
+
+# Must match tnsquery.db.spatial.ZONE_HEIGHT and MAX_ZONE.
+ZONE_HEIGHT = 0.5
+MAX_ZONE = 359
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("transients"):
+        op.create_table(
+            "transients",
+            sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column("name", sa.String(length=100), nullable=False),
+            sa.Column("redshift", sa.Float(), nullable=True),
+            sa.Column("ra", sa.Float(), nullable=True),
+            sa.Column("dec", sa.Float(), nullable=True),
+            sa.Column("ebv", sa.Float(), nullable=True),
+            sa.Column("zone", sa.Integer(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("name"),
+        )
+    elif "zone" not in {col["name"] for col in inspector.get_columns("transients")}:
+        op.add_column("transients", sa.Column("zone", sa.Integer(), nullable=True))
+        op.execute(
+            "UPDATE transients SET zone = LEAST("
+            f"{MAX_ZONE}, GREATEST(0, FLOOR((dec + 90) / {ZONE_HEIGHT})))"
+            " WHERE dec IS NOT NULL",
+        )
+
+    indexes = {index["name"] for index in inspector.get_indexes("transients")}
+    if "ix_transients_zone_ra" not in indexes:
+        op.create_index("ix_transients_zone_ra", "transients", ["zone", "ra"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_transients_zone_ra", table_name="transients")
+    op.drop_column("transients", "zone")
@@ -0,0 +1,30 @@
+"""sync checkpoints table
+
+Revision ID: 8e4b2d9c7f15
+Revises: 3c1f0b6e2a7d
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "8e4b2d9c7f15"
+down_revision = "3c1f0b6e2a7d"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table("sync_checkpoints"):
+        return  # Already created by create_all on startup.
+    op.create_table(
+        "sync_checkpoints",
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("value", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("sync_checkpoints")
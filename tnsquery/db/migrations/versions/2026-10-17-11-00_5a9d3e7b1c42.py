@@ -0,0 +1,43 @@
+"""transient aliases table
+
+Revision ID: 5a9d3e7b1c42
+Revises: 8e4b2d9c7f15
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5a9d3e7b1c42"
+down_revision = "8e4b2d9c7f15"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table("transient_aliases"):
+        return  # Already created by create_all on startup.
+    op.create_table(
+        "transient_aliases",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("alias", sa.String(length=100), nullable=False),
+        sa.Column("transient_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["transient_id"],
+            ["transients.id"],
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("alias"),
+    )
+    op.create_index(
+        "ix_transient_aliases_transient_id",
+        "transient_aliases",
+        ["transient_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_transient_aliases_transient_id", table_name="transient_aliases")
+    op.drop_table("transient_aliases")
@@ -0,0 +1,30 @@
+"""missing transients table
+
+Revision ID: b7e1c4f9a630
+Revises: 5a9d3e7b1c42
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b7e1c4f9a630"
+down_revision = "5a9d3e7b1c42"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table("missing_transients"):
+        return  # Already created by create_all on startup.
+    op.create_table(
+        "missing_transients",
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("checked_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("missing_transients")
@@ -0,0 +1,27 @@
+"""transients fetched_at column
+
+Revision ID: d2a8f6c3e915
+Revises: b7e1c4f9a630
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "d2a8f6c3e915"
+down_revision = "b7e1c4f9a630"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    columns = sa.inspect(op.get_bind()).get_columns("transients")
+    if "fetched_at" in {col["name"] for col in columns}:
+        return  # Already created by create_all on startup.
+    # Existing rows get NULL, they are refreshed from TNS when next read.
+    op.add_column("transients", sa.Column("fetched_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("transients", "fetched_at")
@@ -0,0 +1,32 @@
+"""transients redshift_manual column
+
+Revision ID: f3c7a1d9e284
+Revises: d2a8f6c3e915
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "f3c7a1d9e284"
+down_revision = "d2a8f6c3e915"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Redshifts set by hand before cannot be told apart, they are TNS data.
+    op.add_column(
+        "transients",
+        sa.Column(
+            "redshift_manual",
+            sa.Boolean(),
+            nullable=False,
+            server_default=sa.false(),
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("transients", "redshift_manual")
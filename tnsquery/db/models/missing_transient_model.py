@@ -0,0 +1,13 @@
+from sqlalchemy.sql.schema import Column
+from sqlalchemy.sql.sqltypes import DateTime, String
+
+from tnsquery.db.base import Base
+
+
+class MissingTransientModel(Base):
+    """Name that TNS reported as not found, so it is not looked up again too soon."""
+
+    __tablename__ = "missing_transients"
+
+    name = Column("name", String(100), primary_key=True)  # noqa: WPS432  # Normalized name
+    checked_at = Column("checked_at", DateTime, nullable=False)  # Last TNS lookup (UTC)
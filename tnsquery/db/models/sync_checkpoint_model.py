@@ -0,0 +1,13 @@
+from sqlalchemy.sql.schema import Column
+from sqlalchemy.sql.sqltypes import DateTime, String
+
+from tnsquery.db.base import Base
+
+
+class SyncCheckpointModel(Base):
+    """Progress of a background job, so that it resumes after a restart."""
+
+    __tablename__ = "sync_checkpoints"
+
+    name = Column("name", String(100), primary_key=True)  # noqa: WPS432  # Job name
+    value = Column("value", DateTime, nullable=False)  # Last TNS modification seen (UTC)
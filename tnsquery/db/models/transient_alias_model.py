@@ -0,0 +1,20 @@
+from sqlalchemy.sql.schema import Column, ForeignKey
+from sqlalchemy.sql.sqltypes import Integer, String
+
+from tnsquery.db.base import Base
+
+
+class TransientAliasModel(Base):
+    """Survey internal names (ZTF, ATLAS, Pan-STARRS, ...) of stored transients."""
+
+    __tablename__ = "transient_aliases"
+
+    id = Column("id", Integer, primary_key=True, autoincrement=True)
+    alias = Column("alias", String(100), nullable=False, unique=True)  # noqa: WPS432  # Normalized, see tnsquery.db.names
+    transient_id = Column(
+        "transient_id",
+        Integer,
+        ForeignKey("transients.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
@@ -1,8 +1,10 @@
 from typing import Any
-from sqlalchemy.sql.schema import Column
-from sqlalchemy.sql.sqltypes import Integer, String, Float
+from sqlalchemy.sql.expression import false
+from sqlalchemy.sql.schema import Column, Index
+from sqlalchemy.sql.sqltypes import Boolean, DateTime, Integer, String, Float
 from pydantic.dataclasses import dataclass
 from tnsquery.db.base import Base
+from tnsquery.db.spatial import dec_zone
 
     
 @dataclass
@@ -33,15 +35,32 @@ class ATModel(Base):
     id = Column("id", Integer, primary_key=True, autoincrement=True)  # Local (cached) ID
     name = Column("name", String(100), nullable=False, unique=True)  # noqa: WPS432  # IAU name
     redshift = Column("redshift", Float)
+    # Redshift was set by hand, fetches from TNS keep it.
+    redshift_manual = Column("redshift_manual", Boolean, nullable=False, default=False, server_default=false())
     ra = Column("ra", Float)  # Right ascension (J2000) in degrees
     dec = Column("dec", Float)  # Declination (J2000) in degrees
     ebv = Column("ebv", Float)  # E(B-V) from SFD(2011) dust map from IRSA.
+    zone = Column("zone", Integer)  # Declination zone, see tnsquery.db.spatial
+    fetched_at = Column("fetched_at", DateTime)  # Last write of TNS data (UTC)
+
+    __table_args__ = (Index("ix_transients_zone_ra", "zone", "ra"),)
     
     @classmethod
     def from_transient(cls, transient: Transient) -> "ATModel":
-        return cls(name=transient.name, redshift=transient.redshift,
-                   ra=transient.ra, dec=transient.dec, ebv=transient.ebv)
+        return cls(**cls.row_from_transient(transient))
+
+    @staticmethod
+    def row_from_transient(transient: Transient) -> dict[str, Any]:
+        """Column values of a transient, for use in bulk statements."""
+        return dict(name=transient.name, redshift=transient.redshift,
+                    ra=transient.ra, dec=transient.dec, ebv=transient.ebv,
+                    zone=dec_zone(transient.dec))
     
     def as_transient(self) -> Transient:
         return Transient(name=self.name, redshift=self.redshift,
-                         ra=self.ra, dec=self.dec, ebv=self.ebv)
\ No newline at end of file
+                         ra=self.ra, dec=self.dec, ebv=self.ebv)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Transient data as a plain dict, ready to be JSON encoded without validation."""
+        return dict(name=self.name, redshift=self.redshift,
+                    ra=self.ra, dec=self.dec, ebv=self.ebv)
\ No newline at end of file
@@ -0,0 +1,40 @@
+"""
+Normalization of transient names.
+
+IAU designations are written in many ways ("SN 2022abc", "AT2022abc",
+"2022abc"), they all normalize to the TNS object name ("2022abc").
+Survey internal names ("ZTF22abcdefg", "ATLAS22xyz") are normalized by
+dropping whitespace and case, and are looked up in the alias table.
+"""
+import re
+
+IAU_NAME = re.compile(
+    r"^(?:SN|AT|TDE|FRB|KN|LRN|NOVA)?[-_]?(\d{4})([a-z]{1,4})$",
+    re.IGNORECASE,
+)
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalize a transient name, so that equivalent spellings are equal.
+
+    :param name: IAU or survey internal name, in any spelling.
+    :return: TNS object name for IAU names, else the casefolded name.
+    """
+    compact = "".join(name.split())
+    match = IAU_NAME.match(compact)
+    if match is None:
+        return compact.casefold()
+    year, suffix = match.groups()
+    # TNS capitalizes the first 26 names of a year (2016A), not the rest (2016aa).
+    return year + (suffix.upper() if len(suffix) == 1 else suffix.lower())
+
+
+def is_iau_name(name: str) -> bool:
+    """
+    Check whether a name is an IAU designation.
+
+    :param name: transient name.
+    :return: True for IAU names, False for survey internal names.
+    """
+    return IAU_NAME.match("".join(name.split())) is not None
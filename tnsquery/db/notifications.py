@@ -0,0 +1,66 @@
+"""
+Notifications of changed transients, sent with Postgres NOTIFY.
+
+Every payload is a JSON object with the names of the changed transients
+and the worker that changed them, so it can ignore its own notifications.
+"""
+import json
+import os
+import socket
+from typing import Iterable, List, NamedTuple, Optional
+
+CHANNEL = "tnsquery_transients"
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more.
+MAX_PAYLOAD = 7900
+
+
+class TransientsChanged(NamedTuple):
+    """Decoded notification."""
+
+    origin: str
+    names: List[str]
+
+
+def worker_id() -> str:
+    """Identify this process among the workers of every host."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def encode(names: Iterable[str], origin: Optional[str] = None) -> List[str]:
+    """
+    Encode changed names as payloads below the size limit of NOTIFY.
+
+    :param names: canonical names of changed transients.
+    :param origin: worker that changed them, this one by default.
+    :return: payloads, one NOTIFY each.
+    """
+    origin = origin or worker_id()
+    empty = len(json.dumps({"origin": origin, "names": []}))
+    payloads: List[str] = []
+    chunk: List[str] = []
+    size = empty
+    for name in dict.fromkeys(names):
+        name_size = len(json.dumps(name)) + 2
+        if chunk and size + name_size > MAX_PAYLOAD:
+            payloads.append(json.dumps({"origin": origin, "names": chunk}))
+            chunk, size = [], empty
+        chunk.append(name)
+        size += name_size
+    if chunk:
+        payloads.append(json.dumps({"origin": origin, "names": chunk}))
+    return payloads
+
+
+def decode(payload: str) -> Optional[TransientsChanged]:
+    """
+    Decode a payload.
+
+    :param payload: payload of a notification.
+    :return: decoded notification, None if it is not one of ours.
+    """
+    try:
+        message = json.loads(payload)
+        return TransientsChanged(str(message["origin"]), [str(name) for name in message["names"]])
+    except (ValueError, TypeError, KeyError):
+        return None
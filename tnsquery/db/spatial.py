@@ -0,0 +1,92 @@
+"""
+Declination zones used to index transients on the sky.
+
+The sky is cut into horizontal stripes of ZONE_HEIGHT degrees. Together with
+an index on (zone, ra) a cone search becomes one index range scan per zone
+the cone overlaps, followed by an exact angular distance check of the
+few candidates.
+"""
+import math
+from typing import Optional
+
+# Height of a declination zone in degrees. Stored in the database, so changing
+# it requires recomputing the zone column of every row.
+ZONE_HEIGHT = 0.5
+MAX_ZONE = int(180 / ZONE_HEIGHT) - 1
+
+
+def dec_zone(dec: Optional[float]) -> Optional[int]:
+    """
+    Zone containing a declination.
+
+    :param dec: declination in degrees.
+    :return: zone number, None if the declination is unknown.
+    """
+    if dec is None:
+        return None
+    return min(MAX_ZONE, max(0, math.floor((dec + 90) / ZONE_HEIGHT)))
+
+
+def cone_zones(dec: float, radius: float) -> list[int]:
+    """
+    Zones overlapping a cone.
+
+    :param dec: declination of the cone center in degrees.
+    :param radius: cone radius in degrees.
+    :return: zone numbers.
+    """
+    lowest = dec_zone(max(-90, dec - radius))
+    highest = dec_zone(min(90, dec + radius))
+    return list(range(lowest, highest + 1))  # type: ignore
+
+
+def cone_ra_ranges(ra: float, dec: float, radius: float) -> list[tuple[float, float]]:
+    """
+    Right ascension intervals containing a cone.
+
+    Intervals crossing ra=0 are split in two.
+
+    :param ra: right ascension of the cone center in degrees.
+    :param dec: declination of the cone center in degrees.
+    :param radius: cone radius in degrees.
+    :return: (low, high) right ascension intervals in degrees.
+    """
+    if abs(dec) + radius >= 90:  # noqa: WPS432
+        return [(0, 360)]  # noqa: WPS432
+    half_width = math.degrees(
+        math.atan(
+            math.sin(math.radians(radius))
+            / math.sqrt(
+                abs(
+                    math.cos(math.radians(dec - radius))
+                    * math.cos(math.radians(dec + radius)),
+                ),
+            ),
+        ),
+    )
+    low, high = ra - half_width, ra + half_width
+    if low < 0:
+        return [(0, high), (low + 360, 360)]  # noqa: WPS432
+    if high > 360:  # noqa: WPS432
+        return [(low, 360), (0, high - 360)]  # noqa: WPS432
+    return [(low, high)]
+
+
+def angular_separation(ra1: float, dec1: float, ra2: float, dec2: float) -> float:
+    """
+    Angle between two positions on the sky (Vincenty formula).
+
+    :param ra1: right ascension of the first position in degrees.
+    :param dec1: declination of the first position in degrees.
+    :param ra2: right ascension of the second position in degrees.
+    :param dec2: declination of the second position in degrees.
+    :return: separation in degrees.
+    """
+    ra1, dec1, ra2, dec2 = map(math.radians, (ra1, dec1, ra2, dec2))
+    delta = ra2 - ra1
+    sin_dec1, cos_dec1 = math.sin(dec1), math.cos(dec1)
+    sin_dec2, cos_dec2 = math.sin(dec2), math.cos(dec2)
+    num1 = cos_dec2 * math.sin(delta)
+    num2 = cos_dec1 * sin_dec2 - sin_dec1 * cos_dec2 * math.cos(delta)
+    denominator = sin_dec1 * sin_dec2 + cos_dec1 * cos_dec2 * math.cos(delta)
+    return math.degrees(math.atan2(math.hypot(num1, num2), denominator))
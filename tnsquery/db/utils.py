@@ -1,9 +1,15 @@
+from typing import Optional
+
 from sqlalchemy import text
 from sqlalchemy.engine import make_url
-from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.exc import ProgrammingError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 
 from tnsquery.settings import settings
 
+# Alembic head revision this code expects, update it with every new migration.
+DB_REVISION = "f3c7a1d9e284"
+
 
 async def create_database() -> None:
     """Create a databse."""
@@ -42,3 +48,40 @@ async def drop_database() -> None:
         )
         await conn.execute(text(disc_users))
         await conn.execute(text(f'DROP DATABASE "{settings.db_base}"'))
+
+
+def create_db_engine() -> AsyncEngine:
+    """
+    Create the engine of the application database, configured from settings.
+
+    :return: async engine with a connection pool.
+    """
+    db_url = settings.db_url.with_query(
+        prepared_statement_cache_size=settings.db_statement_cache_size,
+    )
+    return create_async_engine(
+        str(db_url),
+        echo=settings.db_echo,
+        future=True,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        query_cache_size=settings.db_query_cache_size,
+    )
+
+
+async def get_db_revision(engine: AsyncEngine) -> Optional[str]:
+    """
+    Get the alembic revision the database is migrated to.
+
+    :param engine: database engine.
+    :return: revision, None if the database was never migrated.
+    """
+    async with engine.connect() as conn:
+        try:
+            revision = await conn.execute(text("SELECT version_num FROM alembic_version"))
+        except ProgrammingError:
+            return None
+        return revision.scalar()
@@ -0,0 +1,109 @@
+"""Circuit breaker around requests to TNS."""
+import time
+from typing import Callable
+
+
+class CircuitOpenError(Exception):
+    """TNS failed repeatedly, requests are not sent until the breaker resets."""
+
+    def __init__(self, retry_after: float) -> None:
+        super().__init__(f"TNS is unavailable, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Stop calling a failing service for a while instead of waiting on it.
+
+    The breaker opens after failure_threshold consecutive failures. While it
+    is open calls are refused right away. After reset_timeout seconds it is
+    half open and lets one trial call through: its success closes the
+    breaker, its failure opens it again.
+    """
+
+    closed = "closed"
+    open = "open"  # noqa: WPS125
+    half_open = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        reset_timeout: float,
+        timer: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._timer = timer
+        self._state = self.closed
+        self._opened_at = 0.0
+        self._trial_running = False
+        self.failures = 0
+        self.opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        """Current state: closed, open or half_open."""
+        if self._state == self.open and self.retry_after() <= 0:
+            return self.half_open
+        return self._state
+
+    def check(self) -> None:
+        """
+        Reserve a call.
+
+        :raises CircuitOpenError: if the breaker is open, or half open with
+            its trial call already running.
+        """
+        state = self.state
+        if state == self.closed:
+            return
+        if state == self.half_open and not self._trial_running:
+            self._trial_running = True
+            return
+        self.rejected += 1
+        raise CircuitOpenError(max(self.retry_after(), 1))
+
+    def record_success(self) -> None:
+        """Close the breaker after a successful call."""
+        self._state = self.closed
+        self._trial_running = False
+        self.failures = 0
+
+    def release(self) -> None:
+        """End a call that neither succeeded nor failed, e.g. because it was cancelled."""
+        self._trial_running = False
+
+    def record_failure(self) -> None:
+        """Count a failed call, opening the breaker if there were too many."""
+        self.failures += 1
+        self._trial_running = False
+        if self._state == self.open or self.failures >= self.failure_threshold:
+            if self._state != self.open:
+                self.opened += 1
+            self._state = self.open
+            self._opened_at = self._timer()
+
+    def retry_after(self) -> float:
+        """
+        Seconds until the breaker lets a trial call through.
+
+        :return: 0 if it is not open.
+        """
+        if self._state != self.open:
+            return 0
+        return max(self._opened_at + self.reset_timeout - self._timer(), 0)
+
+    def stats(self) -> dict[str, float]:
+        """
+        Breaker statistics.
+
+        :return: whether it is open, consecutive failures and counters.
+        """
+        return {
+            "open": float(self.state != self.closed),
+            "consecutive_failures": self.failures,
+            "opened": self.opened,
+            "rejected": self.rejected,
+            "retry_after": self.retry_after(),
+        }
@@ -0,0 +1,209 @@
+"""Bounded in-process caches."""
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Generic, Hashable, Iterable, NamedTuple, Optional, TypeVar
+
+from tnsquery.db.models.transient_model import Transient
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """
+    LRU cache whose entries also expire after a fixed time to live.
+
+    A maxsize of 0 disables the cache, every lookup is then a miss.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        record_stats: bool = True,
+        timer: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.record_stats = record_stats
+        self._timer = timer
+        self._data: "OrderedDict[K, tuple[float, V]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: K) -> bool:
+        return self.get(key, record=False) is not None
+
+    def get(self, key: K, record: bool = True) -> Optional[V]:
+        """
+        Get a live entry and mark it as recently used.
+
+        :param key: cache key.
+        :param record: whether to count the lookup in the statistics.
+        :return: cached value or None on a miss.
+        """
+        record = record and self.record_stats
+        entry = self._data.get(key)
+        if entry is None:
+            if record:
+                self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= self._timer():
+            del self._data[key]  # noqa: WPS420
+            self._removed(key, value)
+            self.expirations += 1
+            if record:
+                self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        if record:
+            self.hits += 1
+        return value
+
+    def put(self, key: K, value: V) -> None:
+        """
+        Store value, evicting the least recently used entries if full.
+
+        :param key: cache key.
+        :param value: value to cache.
+        """
+        if self.maxsize <= 0:
+            return
+        replaced = self._data.get(key)
+        if replaced is not None:
+            self._removed(key, replaced[1])
+        self._data[key] = (self._timer() + self.ttl, value)
+        self._data.move_to_end(key)
+        self._added(key, value)
+        while len(self._data) > self.maxsize:
+            evicted, (_, evicted_value) = self._data.popitem(last=False)
+            self._removed(evicted, evicted_value)
+            self.evictions += 1
+
+    def pop(self, key: K) -> Optional[V]:
+        """
+        Remove an entry.
+
+        :param key: cache key.
+        :return: removed value, if it was cached.
+        """
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return None
+        self._removed(key, entry[1])
+        return entry[1]
+
+    def discard_where(self, predicate: Callable[[K, V], bool]) -> int:
+        """
+        Remove all entries matching predicate.
+
+        :param predicate: called with key and value of every entry.
+        :return: number of removed entries.
+        """
+        stale = [key for key, (_, value) in self._data.items() if predicate(key, value)]
+        for key in stale:
+            self.pop(key)
+        return len(stale)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        self._data.clear()
+
+    def stats(self) -> dict[str, int]:
+        """
+        Cache statistics.
+
+        :return: hit/miss counters and current size.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+        }
+
+    def _added(self, key: K, value: V) -> None:
+        """Called when an entry is stored, for subclasses keeping indexes."""
+
+    def _removed(self, key: K, value: V) -> None:
+        """Called when an entry is replaced, evicted, expires or is removed."""
+
+
+class CachedTransient(NamedTuple):
+    """Transient with the time its data was fetched from TNS."""
+
+    transient: Transient
+    fetched_at: Optional[datetime] = None
+
+
+class TransientCache(TTLCache[str, CachedTransient]):
+    """
+    Cache of transients keyed by the name they were requested with.
+
+    The keys of every transient are indexed by its canonical name,
+    so refreshing or dropping it costs the number of its spellings
+    instead of a scan of the whole cache.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._keys: dict[str, set[str]] = {}
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        super().clear()
+        self._keys.clear()
+
+    def refresh(self, transient: Transient, fetched_at: Optional[datetime] = None) -> None:
+        """
+        Replace every cached copy of a transient with new data.
+
+        Entries cached under other spellings of the name are dropped,
+        the canonical name is cached with the new data.
+
+        :param transient: up to date transient.
+        :param fetched_at: when its data was fetched from TNS.
+        """
+        self._drop(transient.name)
+        self.put(transient.name, CachedTransient(transient, fetched_at))
+
+    def invalidate(self, name: str) -> None:
+        """
+        Drop every cached copy of a transient.
+
+        :param name: canonical name of the transient.
+        """
+        self.invalidate_many([name])
+
+    def invalidate_many(self, names: Iterable[str]) -> int:
+        """
+        Drop every cached copy of many transients.
+
+        :param names: canonical names of the transients.
+        :return: number of dropped entries.
+        """
+        return sum(self._drop(name) for name in set(names))
+
+    def _drop(self, name: str) -> int:
+        keys = self._keys.get(name, set()) | {name}
+        return sum(self.pop(key) is not None for key in keys)
+
+    def _added(self, key: str, value: CachedTransient) -> None:
+        self._keys.setdefault(value.transient.name, set()).add(key)
+
+    def _removed(self, key: str, value: CachedTransient) -> None:
+        keys = self._keys.get(value.transient.name)
+        if keys is None:
+            return
+        keys.discard(key)
+        if not keys:
+            del self._keys[value.transient.name]  # noqa: WPS420
@@ -0,0 +1,83 @@
+from typing import Optional
+
+from starlette.requests import Request
+
+from tnsquery.services.cache import TransientCache, TTLCache
+from tnsquery.services.dust import SFDMap
+from tnsquery.services.refresh import TransientRefresher
+from tnsquery.services.singleflight import SingleFlight
+from tnsquery.services.tns import TNSAPI
+from tnsquery.services.writebehind import WriteBehindQueue
+
+
+def get_tns_api(request: Request) -> TNSAPI:
+    """
+    Get the application-wide TNS API client.
+
+    The client is created once on startup and keeps
+    its connections to TNS alive between requests.
+
+    :param request: current request.
+    :return: shared TNS API client.
+    """
+    return request.app.state.tns_api
+
+
+def get_tns_single_flight(request: Request) -> SingleFlight:
+    """
+    Get the coalescing layer for TNS lookups.
+
+    :param request: current request.
+    :return: single-flight group shared by the application.
+    """
+    return request.app.state.tns_single_flight
+
+
+def get_transient_cache(request: Request) -> TransientCache:
+    """
+    Get the in-memory transient cache of this worker.
+
+    :param request: current request.
+    :return: transient cache.
+    """
+    return request.app.state.transient_cache
+
+
+def get_transient_refresher(request: Request) -> TransientRefresher:
+    """
+    Get the background refresher of stale transients.
+
+    :param request: current request.
+    :return: transient refresher.
+    """
+    return request.app.state.transient_refresher
+
+
+def get_negative_cache(request: Request) -> "TTLCache[str, bool]":
+    """
+    Get the cache of names TNS does not know, of this worker.
+
+    :param request: current request.
+    :return: not found cache keyed by normalized name.
+    """
+    return request.app.state.negative_cache
+
+
+def get_dust_map(request: Request) -> Optional[SFDMap]:
+    """
+    Get the SFD dust map opened on startup.
+
+    :param request: current request.
+    :return: dust map, None if none is configured.
+    """
+    return request.app.state.dust_map
+
+
+def get_write_behind(request: Request) -> Optional[WriteBehindQueue]:
+    """
+    Get the write-behind queue of fetched transients.
+
+    :param request: current request.
+    :return: shared queue, None if write-behind is disabled.
+    """
+    return request.app.state.write_behind
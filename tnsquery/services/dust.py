@@ -0,0 +1,163 @@
+"""
+Galactic reddening E(B-V) from a local copy of the SFD dust map.
+
+The Schlegel, Finkbeiner & Davis (1998) map comes as two FITS images in
+Lambert zenithal equal-area projection, one per galactic hemisphere
+(SFD_dust_4096_ngp.fits and SFD_dust_4096_sgp.fits). They are memory-mapped,
+so only the pages holding the requested pixels are ever read, and values for
+whole arrays of positions are computed at once with NumPy.
+NumPy is only imported once a map is opened, so importing this module
+stays cheap when no dust map is configured.
+"""
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Sequence, Union
+
+from tnsquery.db.models.transient_model import Transient
+
+if TYPE_CHECKING:
+    import numpy as np  # noqa: F401
+
+# Schlafly & Finkbeiner (2011) recalibration of the SFD map.
+SF11_SCALE = 0.86
+
+# Rotation from equatorial (J2000) to galactic unit vectors.
+EQUATORIAL_TO_GALACTIC = (
+    (-0.0548755604162154, -0.8734370902348850, -0.4838350155487132),
+    (0.4941094278755837, -0.4448296299600112, 0.7469822444972189),
+    (-0.8676661490190047, -0.1980763734312015, 0.4559837761750669),
+)
+
+FITS_BLOCK = 2880
+FITS_CARD = 80
+FITS_DTYPES = {8: ">u1", 16: ">i2", 32: ">i4", -32: ">f4", -64: ">f8"}  # noqa: WPS432
+
+ArrayLike = Union[float, Sequence[float], "np.ndarray"]
+
+
+class DustMapHemisphere:
+    """One memory-mapped hemisphere of the SFD map."""
+
+    def __init__(self, path: Path) -> None:
+        import numpy as np  # noqa: WPS433
+
+        header, offset = read_fits_header(path)
+        self.data = np.memmap(
+            path,
+            dtype=FITS_DTYPES[int(header["BITPIX"])],
+            mode="r",
+            offset=offset,
+            shape=(int(header["NAXIS2"]), int(header["NAXIS1"])),
+        )
+        self.sign = int(header["LAM_NSGP"])  # 1 for the north, -1 for the south
+        self.scale = float(header["LAM_SCAL"])
+        self.crpix1 = float(header["CRPIX1"])
+        self.crpix2 = float(header["CRPIX2"])
+
+    def values(self, lon: "np.ndarray", lat: "np.ndarray") -> "np.ndarray":
+        """
+        Bilinearly interpolated map values.
+
+        :param lon: galactic longitudes in radians.
+        :param lat: galactic latitudes in radians, in this hemisphere.
+        :return: map values.
+        """
+        import numpy as np  # noqa: WPS433
+
+        radius = self.scale * np.sqrt(1 - self.sign * np.sin(lat))
+        x = self.crpix1 - 1 + radius * np.cos(lon)
+        y = self.crpix2 - 1 - self.sign * radius * np.sin(lon)
+
+        height, width = self.data.shape
+        x0 = np.clip(np.floor(x).astype(int), 0, width - 2)
+        y0 = np.clip(np.floor(y).astype(int), 0, height - 2)
+        fx = np.clip(x - x0, 0, 1)
+        fy = np.clip(y - y0, 0, 1)
+        return (
+            self.data[y0, x0] * (1 - fx) * (1 - fy)
+            + self.data[y0, x0 + 1] * fx * (1 - fy)
+            + self.data[y0 + 1, x0] * (1 - fx) * fy
+            + self.data[y0 + 1, x0 + 1] * fx * fy
+        )
+
+
+class SFDMap:
+    """E(B-V) lookup in the SFD dust map."""
+
+    def __init__(self, directory: Path, scale: float = SF11_SCALE) -> None:
+        self.north = DustMapHemisphere(directory / "SFD_dust_4096_ngp.fits")
+        self.south = DustMapHemisphere(directory / "SFD_dust_4096_sgp.fits")
+        self.scale = scale
+
+    def ebv(self, ra: ArrayLike, dec: ArrayLike) -> "np.ndarray":
+        """
+        E(B-V) at equatorial positions.
+
+        :param ra: right ascensions (J2000) in degrees.
+        :param dec: declinations (J2000) in degrees.
+        :return: E(B-V) in magnitudes, with the shape of ra and dec.
+        """
+        import numpy as np  # noqa: WPS433
+
+        lon, lat = equatorial_to_galactic(np.asarray(ra, float), np.asarray(dec, float))
+        north = lat >= 0
+        ebv = np.empty(lon.shape)
+        ebv[north] = self.north.values(lon[north], lat[north])
+        ebv[~north] = self.south.values(lon[~north], lat[~north])
+        return ebv * self.scale
+
+    def fill_ebv(self, transients: Sequence[Transient]) -> None:
+        """
+        Set the E(B-V) of transients, with one vectorized lookup.
+
+        :param transients: transients to update in place.
+        """
+        if not transients:
+            return
+        values = self.ebv(
+            [transient.ra for transient in transients],
+            [transient.dec for transient in transients],
+        )
+        for transient, ebv in zip(transients, values):
+            transient.ebv = float(ebv)
+
+
+def equatorial_to_galactic(ra: "np.ndarray", dec: "np.ndarray") -> tuple["np.ndarray", "np.ndarray"]:
+    """
+    Convert equatorial (J2000) to galactic coordinates.
+
+    :param ra: right ascensions in degrees.
+    :param dec: declinations in degrees.
+    :return: galactic longitudes and latitudes in radians.
+    """
+    import numpy as np  # noqa: WPS433
+
+    ra, dec = np.radians(ra), np.radians(dec)
+    cos_dec = np.cos(dec)
+    equatorial = np.stack([cos_dec * np.cos(ra), cos_dec * np.sin(ra), np.sin(dec)])
+    x, y, z = np.tensordot(np.array(EQUATORIAL_TO_GALACTIC), equatorial, axes=1)
+    return np.arctan2(y, x), np.arcsin(np.clip(z, -1, 1))
+
+
+def read_fits_header(path: Path) -> tuple[dict[str, Any], int]:
+    """
+    Read the primary header of a FITS file.
+
+    :param path: FITS file.
+    :return: header keywords and the byte offset of the image data.
+    """
+    header: dict[str, Any] = {}
+    offset = 0
+    with open(path, "rb") as fits:
+        while True:  # noqa: WPS457
+            block = fits.read(FITS_BLOCK)
+            if len(block) < FITS_BLOCK:
+                raise ValueError(f"Truncated FITS header in {path}")
+            offset += FITS_BLOCK
+            for start in range(0, FITS_BLOCK, FITS_CARD):
+                card = block[start:start + FITS_CARD].decode("ascii")
+                keyword = card[:8].strip()
+                if keyword == "END":
+                    return header, offset
+                if card[8:10] == "= ":
+                    value = card[10:].split("/")[0].strip().strip("'").strip()
+                    header[keyword] = value
@@ -0,0 +1,122 @@
+"""Invalidation of the caches of every worker through Postgres LISTEN/NOTIFY."""
+import asyncio
+import logging
+from typing import Any, Optional
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from tnsquery.db.notifications import CHANNEL, decode, worker_id
+from tnsquery.services.cache import TransientCache, TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class CacheInvalidator:
+    """
+    Drop transients changed by other workers from the caches of this worker.
+
+    Writes send the names of changed transients with pg_notify, Postgres
+    delivers them to every listening worker when the transaction commits.
+    One connection of the engine's pool is kept to listen for them.
+    Notifications sent while it is lost are missed, so the caches are
+    cleared whenever it listens again.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        cache: TransientCache,
+        negative_cache: "TTLCache[str, bool]",
+        check_interval: float = 30.0,
+        reconnect_delay: float = 1.0,
+    ) -> None:
+        self.engine = engine
+        self.cache = cache
+        self.negative_cache = negative_cache
+        self.check_interval = check_interval
+        self.reconnect_delay = reconnect_delay
+        self.origin = worker_id()
+        self.listening = False
+        self._task: Optional["asyncio.Task[None]"] = None
+        self.received = 0
+        self.own = 0
+        self.invalidated = 0
+        self.reconnects = 0
+
+    def start(self) -> None:
+        """Listen for notifications in a background task."""
+        self._task = asyncio.create_task(self._run())
+
+    async def aclose(self) -> None:
+        """Stop listening and close the listening connection."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def stats(self) -> dict[str, int]:
+        """
+        Invalidation statistics.
+
+        :return: counters of notifications and dropped cache entries.
+        """
+        return {
+            "listening": int(self.listening),
+            "received": self.received,
+            "own": self.own,
+            "invalidated": self.invalidated,
+            "reconnects": self.reconnects,
+        }
+
+    def on_notification(self, connection: Any, pid: int, channel: str, payload: str) -> None:
+        """
+        Drop the transients of a notification from the caches.
+
+        :param connection: listening asyncpg connection.
+        :param pid: backend process of the sender.
+        :param channel: notification channel.
+        :param payload: names of the changed transients and their sender.
+        """
+        message = decode(payload)
+        if message is None:
+            return
+        self.received += 1
+        if message.origin == self.origin:
+            self.own += 1
+            return
+        self.invalidated += self.cache.invalidate_many(message.names)
+        for name in message.names:
+            self.negative_cache.pop(name)
+
+    async def _run(self) -> None:
+        first = True
+        while True:  # noqa: WPS457
+            try:
+                await self._listen(clear=not first)
+            except Exception:
+                logger.warning("Cache invalidation connection lost", exc_info=True)
+            self.listening = False
+            first = False
+            self.reconnects += 1
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def _listen(self, clear: bool) -> None:
+        async with self.engine.connect() as conn:
+            raw = await conn.get_raw_connection()
+            driver = raw.driver_connection
+            lost = asyncio.Event()
+            driver.add_termination_listener(lambda _: lost.set())
+            await driver.add_listener(CHANNEL, self.on_notification)
+            if clear:
+                self.cache.clear()
+                self.negative_cache.clear()
+            self.listening = True
+            try:
+                while not lost.is_set():
+                    try:
+                        await asyncio.wait_for(lost.wait(), self.check_interval)
+                    except asyncio.TimeoutError:
+                        # Notice connections that died without being closed.
+                        await asyncio.wait_for(driver.fetchval("SELECT 1"), self.check_interval)
+            finally:
+                # Never give a listening connection back to the pool.
+                await conn.invalidate()
@@ -0,0 +1,228 @@
+"""
+Prometheus metrics of this worker.
+
+A minimal implementation of counters, gauges and histograms rendered in the
+Prometheus text format. Recording a value is a dict lookup and a few list
+operations, so metrics can be recorded on every request.
+"""
+import time
+from bisect import bisect_left
+from types import TracebackType
+from typing import Any, Iterable, Iterator, Optional, Sequence, Type
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# Seconds, from a cache hit up to a slow TNS request.
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class Metric:
+    """Base class of metrics, with labelled samples."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def render(self) -> str:
+        """
+        Render the metric in the Prometheus text format.
+
+        :return: HELP and TYPE lines followed by the samples.
+        """
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(self.samples())
+        return "\n".join(lines) + "\n"
+
+    def samples(self) -> Iterator[str]:
+        """
+        Sample lines of the metric.
+
+        :yield: one line per sample.
+        """
+        yield from ()  # noqa: WPS353
+
+    def _labels(self, values: Sequence[str], extra: str = "") -> str:
+        pairs = [
+            f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, values)
+        ]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter(Metric):
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        """
+        Increase the count.
+
+        :param labels: label values, in the order of labelnames.
+        :param amount: increment.
+        """
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def set(self, value: float, *labels: str) -> None:  # noqa: WPS125
+        """
+        Set the value, for counts kept elsewhere and read when metrics are scraped.
+
+        :param value: new value.
+        :param labels: label values, in the order of labelnames.
+        """
+        self._values[labels] = value
+
+    def samples(self) -> Iterator[str]:  # noqa: D102
+        for labels, value in self._values.items():
+            yield f"{self.name}{self._labels(labels)} {value}"
+
+
+class Gauge(Counter):
+    """Value that can go up and down, usually set when metrics are scraped."""
+
+    kind = "gauge"
+
+
+class Histogram(Metric):
+    """Distribution of observed values, e.g. latencies in seconds."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label values: count of each bucket (not cumulative), +Inf, then the sum.
+        self._values: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        """
+        Record a value.
+
+        :param value: observed value.
+        :param labels: label values, in the order of labelnames.
+        """
+        counts = self._values.get(labels)
+        if counts is None:
+            counts = self._values[labels] = [0] * (len(self.buckets) + 2)
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def time(self, *labels: str) -> "Timer":
+        """
+        Time a block of code.
+
+        :param labels: label values, in the order of labelnames.
+        :return: context manager observing the time spent in it.
+        """
+        return Timer(self, labels)
+
+    def samples(self) -> Iterator[str]:  # noqa: D102
+        bounds = [*(f'le="{bound!r}"' for bound in self.buckets), 'le="+Inf"']
+        for labels, counts in self._values.items():
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                yield f"{self.name}_bucket{self._labels(labels, bound)} {cumulative}"
+            yield f"{self.name}_sum{self._labels(labels)} {counts[-1]}"
+            yield f"{self.name}_count{self._labels(labels)} {cumulative}"
+
+
+class Timer:
+    """Context manager observing the seconds spent in it."""
+
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram: Histogram, labels: tuple[str, ...]) -> None:
+        self.histogram = histogram
+        self.labels = labels
+        self.started = 0.0
+
+    def __enter__(self) -> "Timer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+
+
+def render(metrics: Iterable[Metric]) -> str:
+    """
+    Render metrics in the Prometheus text format.
+
+    :param metrics: metrics to render.
+    :return: exposition text.
+    """
+    return "".join(metric.render() for metric in metrics)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """
+    Time every statement executed by an engine as the db stage.
+
+    :param engine: engine to instrument.
+    """
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _started(conn: Any, *args: Any) -> None:  # noqa: WPS430
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _finished(conn: Any, *args: Any) -> None:  # noqa: WPS430
+        STAGE_LATENCY.observe(time.perf_counter() - conn.info["query_started"].pop(), "db")
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _failed(context: Any) -> None:  # noqa: WPS430
+        if context.connection is None:
+            return
+        started = context.connection.info.get("query_started")
+        if started:
+            STAGE_LATENCY.observe(time.perf_counter() - started.pop(), "db")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REQUEST_LATENCY = Histogram(
+    "tnsquery_request_duration_seconds",
+    "Latency of HTTP requests.",
+    ("method", "route", "status"),
+)
+STAGE_LATENCY = Histogram(
+    "tnsquery_stage_duration_seconds",
+    "Time spent in a stage of request handling: db, tns or serialization.",
+    ("stage",),
+)
+TNS_RESPONSES = Counter(
+    "tnsquery_tns_responses_total",
+    "Responses from TNS by HTTP status, error if no response was received.",
+    ("status",),
+)
+
+METRICS: list[Metric] = [REQUEST_LATENCY, STAGE_LATENCY, TNS_RESPONSES]
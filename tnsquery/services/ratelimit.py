@@ -0,0 +1,165 @@
+"""Rate limiting of requests to TNS, shared by all worker processes."""
+import asyncio
+import fcntl
+import os
+import struct
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, Mapping, Optional
+
+
+class TNSRateLimitError(Exception):
+    """The TNS quota is used up for longer than we are willing to wait."""
+
+    def __init__(self, retry_after: float) -> None:
+        super().__init__(f"TNS rate limit reached, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class SharedTokenBucket:
+    """
+    Token bucket whose state lives in a small file locked with flock.
+
+    Every uvicorn worker on the host opens the same file, so together they
+    stay within one quota. Besides refilling at a steady rate, the bucket
+    follows the remaining quota and reset time TNS reports in its replies.
+    """
+
+    # tokens left, time of last refill, time until which TNS told us to stop
+    _layout = struct.Struct("<ddd")
+
+    def __init__(
+        self,
+        path: Path,
+        capacity: int,
+        period: float,
+        max_wait: float = 0,
+        timer: Callable[[], float] = time.time,
+    ) -> None:
+        self.path = path
+        self.capacity = capacity
+        self.period = period
+        self.max_wait = max_wait
+        self._timer = timer
+        self.throttled = 0
+        self.rejected = 0
+
+    async def acquire(self) -> None:
+        """
+        Take one token, waiting up to max_wait seconds for it.
+
+        :raises TNSRateLimitError: if no token becomes available in time.
+        """
+        deadline = self._timer() + self.max_wait
+        wait = self.try_acquire()
+        if wait:
+            self.throttled += 1
+        while wait:
+            if self._timer() + wait > deadline:
+                self.rejected += 1
+                raise TNSRateLimitError(wait)
+            await asyncio.sleep(wait)
+            wait = self.try_acquire()
+
+    def try_acquire(self) -> float:
+        """
+        Take one token if there is one.
+
+        :return: 0 if a token was taken, else seconds until the next one.
+        """
+        with self._state() as state:
+            now, tokens, blocked_until = state
+            if blocked_until > now:
+                return blocked_until - now
+            if tokens < 1:
+                return (1 - tokens) * self.period / self.capacity
+            state[1] = tokens - 1
+            return 0
+
+    def update(self, remaining: Optional[int], reset: Optional[float]) -> None:
+        """
+        Align the bucket with the quota reported by TNS.
+
+        :param remaining: requests TNS still allows in the current window.
+        :param reset: seconds until TNS resets the window.
+        """
+        with self._state() as state:
+            now = state[0]
+            if remaining is not None:
+                state[1] = min(state[1], remaining)
+            if remaining == 0 and reset is not None:
+                state[2] = max(state[2], now + reset)
+
+    def update_from_headers(self, headers: Mapping[str, str], status_code: int) -> None:
+        """
+        Align the bucket with the rate limit headers of a TNS reply.
+
+        :param headers: response headers.
+        :param status_code: response status, 429 means the quota is exhausted.
+        """
+        remaining = _parse_header(headers, "x-rate-limit-remaining")
+        reset = _parse_header(headers, "x-rate-limit-reset")
+        if status_code == 429:  # noqa: WPS432
+            remaining = 0
+            reset = reset if reset is not None else self.period
+        self.update(None if remaining is None else int(remaining), reset)
+
+    def retry_after(self) -> float:
+        """
+        Seconds until the next token, without taking it.
+
+        :return: 0 if a token is available.
+        """
+        with self._state() as state:
+            now, tokens, blocked_until = state
+        if blocked_until > now:
+            return blocked_until - now
+        return max(0, (1 - tokens) * self.period / self.capacity)
+
+    def stats(self) -> dict[str, float]:
+        """
+        State of the shared bucket and counters of this worker.
+
+        :return: tokens left, seconds TNS asked us to pause,
+            throttled and rejected acquisitions.
+        """
+        with self._state() as state:
+            now, tokens, blocked_until = state
+        return {
+            "tokens": tokens,
+            "blocked_for": max(0, blocked_until - now),
+            "throttled": self.throttled,
+            "rejected": self.rejected,
+        }
+
+    @contextmanager
+    def _state(self) -> Iterator[list[float]]:
+        """
+        Lock the state file and yield [now, tokens, blocked_until].
+
+        The token count is refilled up to now before yielding,
+        changes to the list are written back before unlocking.
+        """
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)  # noqa: WPS432
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            raw = os.pread(fd, self._layout.size, 0)
+            now = self._timer()
+            if len(raw) == self._layout.size:
+                tokens, updated_at, blocked_until = self._layout.unpack(raw)
+            else:
+                tokens, updated_at, blocked_until = self.capacity, now, 0
+            refill = max(0, now - updated_at) * self.capacity / self.period
+            state = [now, min(self.capacity, tokens + refill), blocked_until]
+            yield state
+            os.pwrite(fd, self._layout.pack(state[1], now, state[2]), 0)
+        finally:
+            os.close(fd)  # Closing the descriptor releases the lock.
+
+
+def _parse_header(headers: Mapping[str, str], name: str) -> Optional[float]:
+    try:
+        return float(headers[name])
+    except (KeyError, ValueError):
+        return None
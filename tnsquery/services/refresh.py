@@ -0,0 +1,121 @@
+"""Background refreshes of stored transients from TNS."""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from tnsquery.db.dao.transient_dao import TransientDAO
+from tnsquery.db.models.transient_model import ATModel
+from tnsquery.services.breaker import CircuitOpenError
+from tnsquery.services.cache import CachedTransient, TransientCache
+from tnsquery.services.ratelimit import TNSRateLimitError
+from tnsquery.services.singleflight import SingleFlight
+from tnsquery.services.tns import TNSAPI
+
+logger = logging.getLogger(__name__)
+
+
+class TransientRefresher:
+    """
+    Refresh stale transients from TNS after they have been served.
+
+    A stored transient older than max_age is still returned right away,
+    the refresh runs in a background task with its own database session.
+    Refreshes share the single-flight group of the TNS lookups, so a name
+    is never fetched twice at the same time. Refreshes store through
+    upsert_transient, so a redshift set by hand and a stored ebv are kept.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        tns: TNSAPI,
+        flight: SingleFlight,
+        cache: TransientCache,
+        max_age: timedelta,
+    ) -> None:
+        self.tns = tns
+        self.flight = flight
+        self.cache = cache
+        self.max_age = max_age
+        self.session_factory = sessionmaker(
+            engine,
+            expire_on_commit=False,
+            class_=AsyncSession,  # type: ignore
+            future=True,
+        )
+        self._tasks: dict[str, "asyncio.Task[None]"] = {}
+        self.scheduled = 0
+        self.refreshed = 0
+        self.failed = 0
+
+    def is_stale(self, at: ATModel) -> bool:
+        """
+        Whether a stored transient should be refreshed.
+
+        A max_age of 0 disables refreshes.
+
+        :param at: stored transient.
+        :return: True if it was never fetched or is older than max_age.
+        """
+        if self.max_age <= timedelta(0):
+            return False
+        return at.fetched_at is None or at.fetched_at < datetime.utcnow() - self.max_age
+
+    def schedule(self, name: str) -> bool:
+        """
+        Refresh a transient in the background, unless it is already being fetched.
+
+        :param name: IAU name of the transient, without prefix.
+        :return: whether a refresh was scheduled.
+        """
+        if name in self._tasks or self.flight.in_flight(name):
+            return False
+        task = asyncio.create_task(self._refresh(name))
+        self._tasks[name] = task
+        task.add_done_callback(lambda _: self._tasks.pop(name, None))
+        self.scheduled += 1
+        return True
+
+    async def aclose(self) -> None:
+        """Cancel the refreshes still running."""
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    def stats(self) -> dict[str, int]:
+        """
+        Refresh statistics.
+
+        :return: counters of scheduled, finished and failed refreshes.
+        """
+        return {
+            "scheduled": self.scheduled,
+            "refreshed": self.refreshed,
+            "failed": self.failed,
+            "in_flight": len(self._tasks),
+        }
+
+    async def _refresh(self, name: str) -> None:
+        try:
+            await self.flight.do(name, lambda: self._fetch_and_store(name))
+        except (TNSRateLimitError, CircuitOpenError):
+            self.failed += 1
+            logger.debug("TNS unavailable, %s is refreshed on a later read", name)
+        except Exception:
+            self.failed += 1
+            logger.warning("Refreshing %s from TNS failed", name, exc_info=True)
+        else:
+            self.refreshed += 1
+
+    async def _fetch_and_store(self, name: str) -> CachedTransient:
+        fetched, aliases = await self.tns.make_transient_and_aliases(name)
+        async with self.session_factory() as session:
+            async with session.begin():
+                dao = TransientDAO(session)
+                at = await dao.upsert_transient(fetched)
+                await dao.add_aliases({at.name: aliases})
+        self.cache.refresh(at.as_transient(), at.fetched_at)
+        return CachedTransient(at.as_transient(), at.fetched_at)
@@ -0,0 +1,72 @@
+"""Coalescing of concurrent calls for the same key."""
+import asyncio
+from typing import Any, Awaitable, Callable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Run at most one coroutine per key at a time.
+
+    The first caller for a key starts the work, callers arriving while
+    it is still in flight await the same result instead of repeating it.
+    """
+
+    def __init__(self) -> None:
+        self._in_flight: dict[str, "asyncio.Task[Any]"] = {}
+        self.calls = 0
+        self.executions = 0
+        self.deduplicated = 0
+
+    async def do(self, key: str, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run func for key, or join the call already in flight for it.
+
+        The shared call is shielded, so a cancelled caller does not
+        cancel the work for everyone else waiting on it.
+
+        :param key: key identifying the call.
+        :param func: coroutine function performing the work.
+        :return: result of the (shared) call.
+        """
+        self.calls += 1
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.deduplicated += 1
+        else:
+            self.executions += 1
+            task = asyncio.ensure_future(func())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    def in_flight(self, key: str) -> bool:
+        """
+        Check whether a call for key is running.
+
+        :param key: key identifying the call.
+        :return: True if a call for key has not finished yet.
+        """
+        return key in self._in_flight
+
+    def stats(self) -> dict[str, int]:
+        """
+        Counters of coalesced calls.
+
+        :return: calls made, calls executed, callers deduplicated
+            and calls currently in flight.
+        """
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "deduplicated": self.deduplicated,
+            "in_flight": len(self._in_flight),
+        }
+
+    def _forget(self, key: str, task: "asyncio.Task[Any]") -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]  # noqa: WPS420
+        if not task.cancelled():
+            # Mark the exception as retrieved even if every caller went away.
+            task.exception()
@@ -0,0 +1,143 @@
+"""Incremental sync of stored transients with TNS."""
+import asyncio
+import logging
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from httpx import HTTPStatusError
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from tnsquery.db.dao.sync_checkpoint_dao import SyncCheckpointDAO
+from tnsquery.db.dao.transient_dao import TransientDAO
+from tnsquery.services.tns import TNSAPI
+from tnsquery.services.tns_objects import PublicObjectsChunk, iter_public_object_chunks
+from tnsquery.settings import TEMP_DIR
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_NAME = "tns_public_objects"
+# Postgres advisory lock held while syncing, so only one process syncs at a time.
+SYNC_LOCK_ID = 0x746E7371  # noqa: WPS432
+
+
+class TNSSync:
+    """
+    Upsert the transients TNS modified since the last sync.
+
+    TNS publishes a daily file of the objects added or modified that day.
+    Every file from the day of the checkpoint up to today is downloaded,
+    which costs one request of the TNS quota each, and its rows modified
+    after the checkpoint are upserted in batches. The checkpoint is stored
+    in the database, so a restarted sync resumes where it stopped.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        tns: TNSAPI,
+        chunk_size: int = 1000,
+        initial_lookback: timedelta = timedelta(days=1),
+        workdir: Path = TEMP_DIR,
+    ) -> None:
+        self.engine = engine
+        self.tns = tns
+        self.chunk_size = chunk_size
+        self.initial_lookback = initial_lookback
+        self.workdir = workdir
+        self.session_factory = sessionmaker(
+            engine,
+            expire_on_commit=False,
+            class_=AsyncSession,  # type: ignore
+            future=True,
+        )
+
+    async def run_forever(self, interval: float) -> None:
+        """
+        Sync every interval seconds until cancelled.
+
+        Failures are logged and retried on the next run.
+
+        :param interval: seconds between two syncs.
+        """
+        while True:  # noqa: WPS457
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("TNS sync failed")
+            await asyncio.sleep(interval)
+
+    async def run_once(self) -> int:
+        """
+        Sync once, unless another process is already syncing.
+
+        :return: number of transients upserted.
+        """
+        async with self.engine.connect() as lock_conn:
+            locked = await lock_conn.scalar(select(func.pg_try_advisory_lock(SYNC_LOCK_ID)))
+            if not locked:
+                logger.info("TNS sync is already running in another process")
+                return 0
+            try:
+                return await self._sync()
+            finally:
+                await lock_conn.scalar(select(func.pg_advisory_unlock(SYNC_LOCK_ID)))
+
+    async def _sync(self) -> int:
+        async with self.session_factory() as session:
+            checkpoint = await SyncCheckpointDAO(session).get_checkpoint(CHECKPOINT_NAME)
+        if checkpoint is None:
+            checkpoint = datetime.utcnow() - self.initial_lookback
+
+        synced = 0
+        day = checkpoint.date()
+        while day <= datetime.utcnow().date():
+            day_synced, checkpoint = await self._sync_day(day, checkpoint)
+            synced += day_synced
+            day += timedelta(days=1)
+        logger.info("TNS sync upserted %d transients, checkpoint %s", synced, checkpoint)
+        return synced
+
+    async def _sync_day(self, day: date, checkpoint: datetime) -> tuple[int, datetime]:
+        path = self.workdir / f"tns_public_objects_{day:%Y%m%d}.csv.zip"
+        try:
+            await self.tns.download_public_objects(path, path.name)
+        except HTTPStatusError as exc:
+            if exc.response.status_code != 404:  # noqa: WPS432
+                raise
+            logger.debug("TNS has not published %s yet", path.name)
+            return 0, checkpoint
+
+        synced = 0
+        newest = checkpoint
+        try:
+            chunks = iter_public_object_chunks(
+                path,
+                self.chunk_size,
+                checkpoint,
+                dust_map=self.tns.dust_map,
+            )
+            # Parse in a thread, the event loop may be serving requests.
+            chunk = await asyncio.to_thread(next, chunks, None)
+            while chunk is not None:
+                await self._write(chunk)
+                synced += len(chunk.transients)
+                newest = max(newest, chunk.last_modified or newest)
+                chunk = await asyncio.to_thread(next, chunks, None)
+        finally:
+            path.unlink(missing_ok=True)
+
+        # Rows of a file are not ordered by modification time, so the checkpoint
+        # only moves once the whole file is in. Upserting twice is harmless.
+        async with self.session_factory() as session:
+            async with session.begin():
+                await SyncCheckpointDAO(session).set_checkpoint(CHECKPOINT_NAME, newest)
+        return synced, newest
+
+    async def _write(self, chunk: PublicObjectsChunk) -> None:
+        async with self.session_factory() as session:
+            async with session.begin():
+                dao = TransientDAO(session)
+                await dao.upsert_transients(chunk.transients, returning=False)
+                await dao.add_aliases(chunk.aliases)
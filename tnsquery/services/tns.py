@@ -1,10 +1,18 @@
 """TNS Service module. Provides TNSAPI as an async context manager."""
 from typing import Any, Optional, Type, AsyncGenerator
+import asyncio
+import random
 from pydantic.dataclasses import dataclass
 from dataclasses import field
 import os
-from httpx import AsyncClient, Response
+from pathlib import Path
+from httpx import AsyncClient, HTTPError, Limits, Response, Timeout, TransportError
 from tnsquery.db.models.transient_model import Transient
+from tnsquery.services.breaker import CircuitBreaker
+from tnsquery.services.dust import SFDMap
+from tnsquery.services.metrics import STAGE_LATENCY, TNS_RESPONSES
+from tnsquery.services.ratelimit import SharedTokenBucket, TNSRateLimitError
+from tnsquery.settings import settings
 from enum import Enum
 import json
 
@@ -13,9 +21,14 @@ class StrEnum(str, Enum):
     def __str__(self) -> str:
         return str(self.value)
 
+class TransientNotFoundError(ValueError):
+    """TNS has no object with the requested name."""
+
+
 class TNSURL(StrEnum):
     api = 'https://www.wis-tns.org/api/get'
     search = 'https://www.wis-tns.org/search'
+    public_objects = 'https://www.wis-tns.org/system/files/tns_public_objects'
     
 class Config:
         arbitrary_types_allowed = True
@@ -55,22 +68,109 @@ class TNSAPI:
     bot: TNSBot = field(default_factory=TNSBot)
     client_type: Type[AsyncClient] = field(default=AsyncClient)
     client: AsyncClient = field(init=False)
+    api_url: str = TNSURL.api
     params: dict[str, str] = field(default_factory=dict)
+    limits: Limits = field(default_factory=Limits)
+    timeout: Timeout = field(default_factory=lambda: Timeout(5.0))
+    rate_limiter: Optional[SharedTokenBucket] = None
+    dust_map: Optional[SFDMap] = None
+    breaker: Optional[CircuitBreaker] = None
+    # Object lookups are idempotent, they are retried on timeouts, connection errors and 5xx.
+    retries: int = 0
+    retry_backoff: float = 0.25
+    # Send a second request if the first has not answered after this many seconds.
+    hedge_after: Optional[float] = None
     
     def __post_init__(self) -> None:
         """Post init."""
         self.params = {'api_key': self.bot.api_key}
         self.data = {'photometry': '0', 'spectra': '0'}
-        self.client = self.client_type()
+        self.client = self.client_type(limits=self.limits, timeout=self.timeout)
         
     async def get_obj(self, name: str) -> Optional[dict[str, Any]]:
         data = {'objname': name, 'photometry': '0', 'spectra': '0'}
         params = {'api_key': self.bot.api_key, 'data': json.dumps(data)}
 
-        response = await self.client.post(url=TNSURL.api+"/object", data=params, headers=self.bot.headers)
+        if self.breaker is not None:
+            self.breaker.check()
+        try:
+            response = await self._post_retrying(f"{self.api_url}/object", params)
+        except TransportError:
+            if self.breaker is not None:
+                self.breaker.record_failure()
+            raise
+        except BaseException:
+            if self.breaker is not None:
+                self.breaker.release()
+            raise
+        if self.breaker is not None:
+            # A 429 is no answer either, keep calling and TNS keeps refusing.
+            if response.status_code == 429 or response.status_code >= 500:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+        if self.rate_limiter is not None and response.status_code == 429:
+            raise TNSRateLimitError(self.rate_limiter.retry_after())
         data = self.validate_response(response)
         return data
 
+    async def _post_retrying(self, url: str, params: dict[str, str]) -> Response:
+        """POST an idempotent request, retrying with jittered exponential backoff."""
+        attempt = 0
+        while True:  # noqa: WPS457
+            try:
+                response = await self._post(url, params)
+            except TransportError:
+                if attempt >= self.retries:
+                    raise
+            else:
+                if response.status_code < 500 or attempt >= self.retries:
+                    return response
+            await asyncio.sleep(random.uniform(0, self.retry_backoff * 2 ** attempt))
+            attempt += 1
+
+    async def _post(self, url: str, params: dict[str, str]) -> Response:
+        """POST within the rate limit, hedged if configured, recording metrics."""
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire()
+        try:
+            with STAGE_LATENCY.time("tns"):
+                if self.hedge_after is None:
+                    response = await self.client.post(url=url, data=params, headers=self.bot.headers)
+                else:
+                    response = await self._post_hedged(url, params)
+        except HTTPError:
+            TNS_RESPONSES.inc("error")
+            raise
+        TNS_RESPONSES.inc(str(response.status_code))
+        if self.rate_limiter is not None:
+            self.rate_limiter.update_from_headers(response.headers, response.status_code)
+        return response
+
+    async def _post_hedged(self, url: str, params: dict[str, str]) -> Response:
+        """
+        POST, and POST again if there is no answer after hedge_after seconds.
+
+        The first successful answer wins and the other request is cancelled.
+        The second request needs a token of the rate limit, without waiting.
+        """
+        first = asyncio.create_task(self.client.post(url=url, data=params, headers=self.bot.headers))
+        done, _ = await asyncio.wait({first}, timeout=self.hedge_after)
+        if done or (self.rate_limiter is not None and self.rate_limiter.try_acquire() > 0):
+            return await first
+        second = asyncio.create_task(self.client.post(url=url, data=params, headers=self.bot.headers))
+        pending = {first, second}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+            return first.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
     @staticmethod
     def validate_response(response: Response) -> Optional[dict[str, Any]]:
         response.raise_for_status()
@@ -87,18 +187,105 @@ class TNSAPI:
         return None
     
     async def make_transient(self, name: str) -> Transient:
+        transient, _ = await self.make_transient_and_aliases(name)
+        return transient
+
+    async def make_transient_and_aliases(self, name: str) -> tuple[Transient, list[str]]:
+        """Fetch a transient together with its survey internal names."""
         data = await self.get_obj(name)
         if data is None:
-            raise ValueError(f"Transient not found: {name}")
+            raise TransientNotFoundError(f"Transient not found: {name}")
         name = data['objname']
         z = data['redshift'] if data['redshift'] else 0
         ra = data['radeg']
         dec =  data['decdeg']
         ebv = 0.
-        return Transient(name=name, redshift=z, ra=ra, dec=dec, ebv=ebv)
-    
+        if self.dust_map is not None:
+            ebv = float(self.dust_map.ebv(ra, dec))
+        transient = Transient(name=name, redshift=z, ra=ra, dec=dec, ebv=ebv)
+        return transient, data['internal_names']
+
+    async def download_public_objects(
+        self, path: Path, filename: str = "tns_public_objects.csv.zip",
+    ) -> Path:
+        """
+        Stream one of the TNS public objects files to disk.
+
+        :param path: destination file.
+        :param filename: name of the file on TNS.
+        :return: destination file.
+        """
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire()
+        url = f"{TNSURL.public_objects}/{filename}"
+        params = {'api_key': self.bot.api_key}
+        async with self.client.stream("POST", url, data=params, headers=self.bot.headers) as response:
+            TNS_RESPONSES.inc(str(response.status_code))
+            if self.rate_limiter is not None:
+                self.rate_limiter.update_from_headers(response.headers, response.status_code)
+            response.raise_for_status()
+            with open(path, 'wb') as f:
+                async for chunk in response.aiter_bytes():
+                    f.write(chunk)
+        return path
+
+    async def aclose(self) -> None:
+        """Close the underlying connection pool."""
+        await self.client.aclose()
+
     async def __aenter__(self):
         return self
 
     async def __aexit__(self, *excinfo):
-        await self.client.aclose()
+        await self.aclose()
+
+
+def create_dust_map() -> Optional[SFDMap]:
+    """
+    Open the SFD dust map configured in settings.
+
+    :return: dust map, None if no dust map directory is configured.
+    """
+    if settings.dust_map_dir is None:
+        return None
+    return SFDMap(settings.dust_map_dir, scale=settings.dust_map_scale)
+
+
+def create_tns_api(dust_map: Optional[SFDMap] = None) -> TNSAPI:
+    """
+    Create a TNS API client configured from settings.
+
+    The client keeps its connections alive and shares the
+    TNS quota with every other process on this host.
+    Lookups are retried and stop for a while if TNS keeps failing.
+
+    :param dust_map: dust map filling in the E(B-V) of fetched transients.
+    :return: TNS API client, close it with aclose().
+    """
+    return TNSAPI(
+        api_url=settings.tns_api_url,
+        limits=Limits(
+            max_connections=settings.tns_max_connections,
+            max_keepalive_connections=settings.tns_max_keepalive_connections,
+            keepalive_expiry=settings.tns_keepalive_expiry,
+        ),
+        timeout=Timeout(
+            settings.tns_timeout,
+            connect=settings.tns_connect_timeout,
+            pool=settings.tns_pool_timeout,
+        ),
+        rate_limiter=SharedTokenBucket(
+            path=settings.tns_rate_state_file,
+            capacity=settings.tns_rate_limit,
+            period=settings.tns_rate_period,
+            max_wait=settings.tns_rate_max_wait,
+        ),
+        dust_map=dust_map,
+        breaker=CircuitBreaker(
+            failure_threshold=settings.tns_breaker_failures,
+            reset_timeout=settings.tns_breaker_reset,
+        ),
+        retries=settings.tns_retries,
+        retry_backoff=settings.tns_retry_backoff,
+        hedge_after=settings.tns_hedge_after,
+    )
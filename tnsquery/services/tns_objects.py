@@ -0,0 +1,145 @@
+"""Reading of the TNS public objects CSV files."""
+import csv
+import io
+import zipfile
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple, Optional, TextIO, TypeVar
+
+from tnsquery.db.models.transient_model import Transient
+from tnsquery.services.dust import SFDMap
+
+T = TypeVar("T")
+
+
+class PublicObjectsChunk(NamedTuple):
+    """A chunk of objects read from a public objects file."""
+
+    transients: list[Transient]
+    # Survey internal names keyed by IAU name
+    aliases: dict[str, list[str]]
+    # Newest modification time in the chunk, None if the file has no such column
+    last_modified: Optional[datetime]
+
+
+@contextmanager
+def open_public_objects(path: Path) -> Iterator[TextIO]:
+    """
+    Open a public objects file as text, whether zipped or not.
+
+    :param path: tns_public_objects CSV file or its zip archive.
+    :yield: text stream of the CSV file.
+    """
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            member = next(name for name in archive.namelist() if name.endswith(".csv"))
+            with archive.open(member) as raw:
+                yield io.TextIOWrapper(raw, encoding="utf-8", newline="")
+    else:
+        with open(path, encoding="utf-8", newline="") as text:
+            yield text
+
+
+def read_public_objects(stream: TextIO) -> Iterator[dict[str, str]]:
+    """
+    Iterate over the rows of a public objects CSV file.
+
+    The file starts with the time it was generated, followed by the header.
+
+    :param stream: text stream of the CSV file.
+    :return: rows keyed by column name.
+    """
+    first_line = stream.readline()
+    header = None
+    if "objid" in first_line:
+        header = next(csv.reader([first_line]))
+    return csv.DictReader(stream, fieldnames=header)
+
+
+def transient_from_row(row: dict[str, str]) -> Transient:
+    """
+    Build a transient from a public objects row.
+
+    :param row: CSV row keyed by column name.
+    :return: transient, with no E(B-V) yet.
+    """
+    return Transient(
+        name=row["name"],
+        redshift=float(row["redshift"] or 0),
+        ra=float(row["ra"]),
+        dec=float(row["declination"]),
+        ebv=0,
+    )
+
+
+def aliases_from_row(row: dict[str, str]) -> list[str]:
+    """
+    Survey internal names of a public objects row.
+
+    :param row: CSV row keyed by column name.
+    :return: internal names, such as ZTF or ATLAS names.
+    """
+    internal_names = row.get("internal_names") or ""
+    return [name.strip() for name in internal_names.split(",") if name.strip()]
+
+
+def modified_at(row: dict[str, str]) -> datetime:
+    """
+    Time a public objects row was last modified on TNS.
+
+    :param row: CSV row keyed by column name.
+    :return: last modification time (UTC).
+    """
+    return datetime.fromisoformat(row["lastmodified"])
+
+
+def chunked(iterable: Iterable[T], size: int) -> Iterator[list[T]]:
+    """
+    Split an iterable into lists of at most size items.
+
+    :param iterable: items to split.
+    :param size: largest chunk size.
+    :yield: chunks of items.
+    """
+    iterator = iter(iterable)
+    chunk = list(islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, size))
+
+
+def iter_public_object_chunks(
+    path: Path,
+    chunk_size: int,
+    modified_after: Optional[datetime] = None,
+    dust_map: Optional[SFDMap] = None,
+) -> Iterator[PublicObjectsChunk]:
+    """
+    Stream a public objects file as chunks of transients.
+
+    Only one chunk is held in memory at a time.
+
+    :param path: tns_public_objects CSV file or its zip archive.
+    :param chunk_size: transients per chunk.
+    :param modified_after: if given, objects modified at or before it are skipped.
+    :param dust_map: if given, the E(B-V) of each chunk is looked up in it.
+    :yield: chunks of transients with their aliases.
+    """
+    with open_public_objects(path) as stream:
+        rows: Iterable[dict[str, str]] = read_public_objects(stream)
+        if modified_after is not None:
+            rows = (row for row in rows if modified_at(row) > modified_after)
+        for chunk in chunked(rows, chunk_size):
+            last_modified = None
+            if chunk[0].get("lastmodified"):
+                last_modified = max(modified_at(row) for row in chunk)
+            transients = [transient_from_row(row) for row in chunk]
+            if dust_map is not None:
+                dust_map.fill_ebv(transients)
+            yield PublicObjectsChunk(
+                transients=transients,
+                aliases={row["name"]: aliases_from_row(row) for row in chunk},
+                last_modified=last_modified,
+            )
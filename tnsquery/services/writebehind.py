@@ -0,0 +1,171 @@
+"""Write-behind batching of transients fetched from TNS."""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from tnsquery.db.dao.transient_dao import TransientDAO
+from tnsquery.db.models.transient_model import Transient
+from tnsquery.db.names import normalize_name
+from tnsquery.services.cache import CachedTransient
+
+logger = logging.getLogger(__name__)
+
+
+class PendingTransient(NamedTuple):
+    """Fetched transient waiting to be stored."""
+
+    entry: CachedTransient
+    aliases: List[str]
+
+
+class WriteBehindQueue:
+    """
+    Store fetched transients in batches, after their request was answered.
+
+    Transients are buffered and written with one multi-row upsert every
+    interval seconds, or as soon as max_rows are waiting. Until then they
+    are served from the buffer, by name and by alias, so a read right
+    after a write sees it. If writing fails, the rows are kept for the next
+    flush; once ten times max_rows are waiting, adding waits for a flush.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        interval: float = 0.05,
+        max_rows: int = 500,
+    ) -> None:
+        self.interval = interval
+        self.max_rows = max_rows
+        self.session_factory = sessionmaker(
+            engine,
+            expire_on_commit=False,
+            class_=AsyncSession,  # type: ignore
+            future=True,
+        )
+        self._pending: Dict[str, PendingTransient] = {}
+        self._flushing: Dict[str, PendingTransient] = {}
+        self._aliases: Dict[str, str] = {}
+        self._full = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task: Optional["asyncio.Task[None]"] = None
+        self.queued = 0
+        self.flushed = 0
+        self.flushes = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        """Flush in a background task."""
+        self._task = asyncio.create_task(self._run())
+
+    async def aclose(self) -> None:
+        """Stop the background task and store what is still waiting."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        try:
+            await self.flush()
+        except Exception:
+            logger.error("%d fetched transients were not stored", len(self._pending), exc_info=True)
+
+    async def add(self, transient: Transient, aliases: List[str]) -> CachedTransient:
+        """
+        Queue a transient fetched from TNS.
+
+        :param transient: fetched transient.
+        :param aliases: its survey internal names.
+        :return: the transient as it is served until and after it is stored.
+        """
+        if len(self._pending) >= self.max_rows * 10:
+            await self.flush()
+        entry = CachedTransient(transient, datetime.utcnow())
+        self._pending[transient.name] = PendingTransient(entry, aliases)
+        for alias in aliases:
+            self._aliases[normalize_name(alias)] = transient.name
+        self.queued += 1
+        if len(self._pending) >= self.max_rows:
+            self._full.set()
+        return entry
+
+    def get(self, key: str) -> Optional[CachedTransient]:
+        """
+        Get a transient that is not stored yet.
+
+        :param key: normalized name or alias.
+        :return: the queued transient, None if none is waiting.
+        """
+        name = self._aliases.get(key, key)
+        pending = self._pending.get(name) or self._flushing.get(name)
+        return None if pending is None else pending.entry
+
+    async def flush(self) -> int:
+        """
+        Store every waiting transient now.
+
+        :return: number of stored transients.
+        """
+        async with self._lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, {}
+            self._flushing = batch
+            try:
+                await self._store(batch)
+            except BaseException:
+                # Keep them for the next flush, newer data for the same names wins.
+                self._pending = {**batch, **self._pending}
+                self.failed += 1
+                raise
+            finally:
+                self._flushing = {}
+            self._aliases = {
+                alias: name for alias, name in self._aliases.items() if name in self._pending
+            }
+            self.flushed += len(batch)
+            self.flushes += 1
+            return len(batch)
+
+    def stats(self) -> dict[str, int]:
+        """
+        Write-behind statistics.
+
+        :return: counters of queued and stored transients and of flushes.
+        """
+        return {
+            "queued": self.queued,
+            "flushed": self.flushed,
+            "flushes": self.flushes,
+            "failed": self.failed,
+            "pending": len(self._pending),
+        }
+
+    async def _run(self) -> None:
+        while True:  # noqa: WPS457
+            try:
+                await asyncio.wait_for(self._full.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass  # noqa: WPS420
+            self._full.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.warning(
+                    "Storing %d fetched transients failed, retrying",
+                    len(self._pending),
+                    exc_info=True,
+                )
+                await asyncio.sleep(self.interval)
+
+    async def _store(self, batch: Dict[str, PendingTransient]) -> None:
+        async with self.session_factory() as session:
+            async with session.begin():
+                dao = TransientDAO(session)
+                await dao.upsert_transients(
+                    [pending.entry.transient for pending in batch.values()],
+                    returning=False,
+                )
+                await dao.add_aliases({name: pending.aliases for name, pending in batch.items()})
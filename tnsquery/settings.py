@@ -1,6 +1,7 @@
 import enum
 from pathlib import Path
 from tempfile import gettempdir
+from typing import Optional
 
 from pydantic import BaseSettings
 from yarl import URL
@@ -53,6 +54,107 @@ class Settings(BaseSettings):
     db_pass: str = "tnsquery"
     db_base: str = "tnsquery"
     db_echo: bool = False
+    # Connection pool of each worker: persistent connections, extra connections
+    # opened under load, seconds to wait for a free one and seconds after
+    # which connections are replaced (-1 never)
+    db_pool_size: int = 10
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 10.0
+    db_pool_recycle: int = 1800
+    # Test connections with a round trip before using them, survives database restarts
+    db_pool_pre_ping: bool = False
+    # Prepared statements cached per asyncpg connection, 0 behind pgbouncer in transaction mode
+    db_statement_cache_size: int = 500
+    # Compiled SQL statements cached by SQLAlchemy per engine
+    db_query_cache_size: int = 500
+
+    # TNS API base URL, point it at benchmarks/fake_tns.py for load tests
+    tns_api_url: str = "https://www.wis-tns.org/api/get"
+    # Variables for the shared TNS HTTP client, timeouts in seconds
+    tns_timeout: float = 5.0
+    tns_connect_timeout: float = 3.0
+    # Longest a request waits for a free connection to TNS
+    tns_pool_timeout: float = 1.0
+    tns_max_connections: int = 10
+    tns_max_keepalive_connections: int = 5
+    tns_keepalive_expiry: float = 30.0
+
+    # TNS quota shared by all workers on this host: requests per period (seconds)
+    tns_rate_limit: int = 25
+    tns_rate_period: float = 60.0
+    # Longest a request waits for quota before failing with 503
+    tns_rate_max_wait: float = 5.0
+    # File holding the shared quota state, must be the same for all workers
+    tns_rate_state_file: Path = TEMP_DIR / "tnsquery_tns_ratelimit"
+
+    # Retries of TNS lookups after timeouts, connection errors and 5xx,
+    # waiting a random time up to tns_retry_backoff * 2**attempt seconds
+    tns_retries: int = 2
+    tns_retry_backoff: float = 0.25
+    # Send a second TNS request if the first has not answered after this
+    # many seconds, unset to disable hedging
+    tns_hedge_after: Optional[float] = None
+    # Consecutive failed TNS lookups that open the circuit breaker, and seconds
+    # it stays open before a trial lookup is let through
+    tns_breaker_failures: int = 5
+    tns_breaker_reset: float = 30.0
+
+    # Most names accepted by one batch lookup
+    batch_max_names: int = 1000
+    # Concurrent TNS requests made for the misses of one batch lookup
+    batch_tns_concurrency: int = 4
+
+    # Directory with SFD_dust_4096_ngp.fits and SFD_dust_4096_sgp.fits,
+    # E(B-V) is not looked up if unset
+    dust_map_dir: Optional[Path] = None
+    # Factor applied to SFD values, 0.86 is the Schlafly & Finkbeiner (2011) recalibration
+    dust_map_scale: float = 0.86
+
+    # Largest radius accepted by cone searches, in degrees
+    cone_max_radius: float = 5.0
+
+    # Periodically upsert transients modified on TNS from the web workers
+    sync_enabled: bool = False
+    # Seconds between two syncs
+    sync_interval: float = 3600.0
+    # Transients upserted per statement
+    sync_chunk_size: int = 1000
+    # How far back the very first sync looks, in days
+    sync_initial_lookback_days: int = 1
+
+    # In-memory cache of transients served by this worker, 0 disables it
+    cache_size: int = 10000
+    # Seconds before a cached transient is read from the database again
+    cache_ttl: float = 300.0
+    # Count cache hits and misses
+    cache_stats: bool = True
+
+    # Seconds after which a stored transient is refreshed from TNS
+    # in the background when it is read, 0 disables refreshes
+    refresh_after: float = 86400.0
+
+    # Seconds clients and proxies may reuse a transient response without revalidating
+    http_cache_max_age: int = 60
+
+    # Record request latencies and serve them at /api/metrics
+    metrics_enabled: bool = True
+
+    # Names TNS does not know, remembered per worker, 0 disables it
+    negative_cache_size: int = 10000
+    # Seconds before a name TNS did not know is looked up on TNS again
+    negative_cache_ttl: float = 3600.0
+    # Also remember them in the database, shared by all workers and restarts
+    negative_cache_db: bool = False
+    # Tell the other workers about changed transients with Postgres
+    # LISTEN/NOTIFY, so they drop them from their caches
+    cache_invalidation: bool = True
+
+    # Store transients fetched on lookups in batches after answering, every
+    # write_behind_interval seconds or once write_behind_max_rows are waiting.
+    # Other workers see them once stored.
+    write_behind: bool = False
+    write_behind_interval: float = 0.05
+    write_behind_max_rows: int = 500
 
     @property
     def db_url(self) -> URL:
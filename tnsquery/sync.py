@@ -0,0 +1,61 @@
+"""
+Sync stored transients with the objects recently modified on TNS.
+
+The web workers can run the same sync in the background with
+TNSQUERY_SYNC_ENABLED, this command runs it on its own instead.
+
+Run it with `python -m tnsquery.sync [--once]`.
+"""
+import argparse
+import asyncio
+import logging
+from datetime import timedelta
+from typing import Optional, Sequence
+
+from tnsquery.db.utils import create_db_engine
+from tnsquery.services.sync import TNSSync
+from tnsquery.services.tns import create_tns_api
+from tnsquery.settings import settings
+
+
+async def sync(once: bool) -> None:
+    """
+    Run the TNS sync.
+
+    :param once: sync a single time instead of every sync_interval seconds.
+    """
+    engine = create_db_engine()
+    try:
+        async with create_tns_api() as tns:
+            tns_sync = TNSSync(
+                engine=engine,
+                tns=tns,
+                chunk_size=settings.sync_chunk_size,
+                initial_lookback=timedelta(days=settings.sync_initial_lookback_days),
+            )
+            if once:
+                await tns_sync.run_once()
+            else:
+                await tns_sync.run_forever(settings.sync_interval)
+    finally:
+        await engine.dispose()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """
+    Entrypoint of the sync command.
+
+    :param argv: command line arguments.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--once", action="store_true", help="Sync once and exit.")
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=settings.log_level.value,
+        format="%(asctime)s %(levelname)s %(message)s",
+    )
+    asyncio.run(sync(args.once))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+from typing import Callable
+
+import pytest
+from httpx import (
+    AsyncClient,
+    ConnectTimeout,
+    HTTPStatusError,
+    MockTransport,
+    Request,
+    Response,
+)
+
+from tnsquery.conftest import FakeClock
+from tnsquery.services.breaker import CircuitBreaker, CircuitOpenError
+from tnsquery.services.tns import TNSAPI, TNSBot
+
+
+def test_breaker_opens_and_resets(clock: FakeClock) -> None:
+    """The breaker opens after repeated failures and lets one trial call through later."""
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, timer=clock)
+
+    breaker.check()
+    breaker.record_failure()
+    breaker.check()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError) as exc_info:
+        breaker.check()
+    assert exc_info.value.retry_after == pytest.approx(30)
+
+    clock.now += 30
+    assert breaker.state == "half_open"
+    breaker.check()
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    clock.now += 30
+    breaker.check()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.stats()["opened"] == 1
+
+
+def make_tns(handler: Callable[[Request], Response], **kwargs: object) -> TNSAPI:
+    class MockClient(AsyncClient):
+        def __init__(self, **client_kwargs: object) -> None:
+            super().__init__(transport=MockTransport(handler), **client_kwargs)
+
+    return TNSAPI(bot=TNSBot(), client_type=MockClient, retry_backoff=0, **kwargs)
+
+
+@pytest.mark.anyio
+async def test_lookups_are_retried(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Timeouts and 5xx are retried, the first good answer is used."""
+    monkeypatch.setenv("TNS_API_KEY", "key")
+    replies = [ConnectTimeout("slow"), Response(502), Response(200, json={"data": {"reply": {}}})]
+
+    def handler(request: Request) -> Response:
+        reply = replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    tns = make_tns(handler, retries=2)
+    assert await tns.get_obj("2022abc") is None
+    assert not replies
+
+
+@pytest.mark.anyio
+async def test_open_breaker_fails_fast(monkeypatch: pytest.MonkeyPatch) -> None:
+    """After repeated failures, lookups are refused without a request."""
+    monkeypatch.setenv("TNS_API_KEY", "key")
+    requests = 0
+
+    def handler(request: Request) -> Response:
+        nonlocal requests
+        requests += 1
+        raise ConnectTimeout("down")
+
+    tns = make_tns(handler, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=30))
+    for _ in range(2):
+        with pytest.raises(ConnectTimeout):
+            await tns.get_obj("2022abc")
+    with pytest.raises(CircuitOpenError):
+        await tns.get_obj("2022abc")
+    assert requests == 2
+
+
+@pytest.mark.anyio
+async def test_rate_limited_lookups_count_as_failures(monkeypatch: pytest.MonkeyPatch) -> None:
+    """429 answers open the breaker like 5xx answers."""
+    monkeypatch.setenv("TNS_API_KEY", "key")
+    replies = [Response(429), Response(503)]
+
+    def handler(request: Request) -> Response:
+        return replies.pop(0)
+
+    tns = make_tns(handler, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=30))
+    for _ in range(2):
+        with pytest.raises(HTTPStatusError):
+            await tns.get_obj("2022abc")
+    with pytest.raises(CircuitOpenError):
+        await tns.get_obj("2022abc")
+    assert not replies
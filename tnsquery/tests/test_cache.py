@@ -0,0 +1,64 @@
+from tnsquery.conftest import FakeClock
+from tnsquery.db.models.transient_model import Transient
+from tnsquery.services.cache import CachedTransient, TransientCache, TTLCache
+
+
+def test_lru_eviction_and_ttl(clock: FakeClock) -> None:
+    """Least recently used entries are evicted and old entries expire."""
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl=10, timer=clock)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+    clock.now += 11
+    assert cache.get("a") is None
+    assert cache.stats() == {
+        "hits": 2,
+        "misses": 2,
+        "evictions": 1,
+        "expirations": 1,
+        "size": 1,
+        "maxsize": 2,
+    }
+
+
+def test_refresh_replaces_every_spelling() -> None:
+    """Refreshing a transient drops copies cached under other names."""
+    cache = TransientCache(maxsize=10, ttl=10)
+    old = Transient(name="2022abc", redshift=0, ra=1, dec=2, ebv=0)
+    cache.put("SN2022abc", CachedTransient(old))
+    cache.put("2022abc", CachedTransient(old))
+
+    new = Transient(name="2022abc", redshift=0.05, ra=1, dec=2, ebv=0)
+    cache.refresh(new)
+
+    assert cache.get("SN2022abc") is None
+    assert cache.get("2022abc") == (new, None)
+
+    cache.invalidate("2022abc")
+    assert not len(cache)
+
+
+def test_name_index_follows_the_cache(clock: FakeClock) -> None:
+    """Refreshes and invalidations find the keys left after evictions and replacements."""
+    cache = TransientCache(maxsize=3, ttl=10, timer=clock)
+    first = Transient(name="2022abc", redshift=0, ra=1, dec=2, ebv=0)
+    second = Transient(name="2022abd", redshift=0, ra=1, dec=2, ebv=0)
+    cache.put("ZTF22aaaaaaa", CachedTransient(first))
+    cache.put("2022abc", CachedTransient(first))
+    cache.put("ATLAS22abc", CachedTransient(first))
+    cache.put("ATLAS22abc", CachedTransient(second))
+    cache.put("2022abd", CachedTransient(second))
+
+    assert cache.invalidate_many(["2022abc"]) == 1
+    assert cache._keys == {"2022abd": {"ATLAS22abc", "2022abd"}}  # noqa: WPS437
+
+    clock.now += 11
+    assert cache.get("2022abd") is None
+    cache.refresh(second)
+    assert cache.get("ATLAS22abc") is None
+    assert cache._keys == {"2022abd": {"2022abd"}}  # noqa: WPS437
@@ -0,0 +1,71 @@
+from datetime import datetime
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from tnsquery.db.models.transient_model import Transient
+from tnsquery.web.api.transient.conditional import json_response, make_etag, transient_dict
+
+FETCHED_AT = datetime(2022, 11, 13, 11, 15, 30, 123456)
+
+
+def make_request(**headers: str) -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "headers": [
+                (key.replace("_", "-").encode(), value.encode())
+                for key, value in headers.items()
+            ],
+        },
+    )
+
+
+def respond(**headers: str) -> Response:
+    content = transient_dict(Transient(name="2022abc", redshift=0.05, ra=1, dec=2, ebv=0.01))
+    return json_response(make_request(**headers), content, make_etag([content]), FETCHED_AT)
+
+
+def test_etag_follows_data() -> None:
+    """Equal data gives equal tags, any change gives a new one."""
+    transient = {"name": "2022abc", "redshift": 0.05, "ra": 1, "dec": 2, "ebv": 0.01}
+    patched = {**transient, "redshift": 0.06}
+
+    assert make_etag([transient]) == make_etag([transient])
+    assert make_etag([transient]) != make_etag([patched])
+    assert make_etag([transient], "cursor") != make_etag([transient])
+
+
+def test_headers_are_set() -> None:
+    """Full responses carry the body, the validators and a Cache-Control header."""
+    response = respond()
+
+    assert response.status_code == 200
+    assert response.body.startswith(b'{"name":"2022abc"')
+    assert response.headers["etag"].startswith('"')
+    assert response.headers["last-modified"] == "Sun, 13 Nov 2022 11:15:30 GMT"
+    assert response.headers["cache-control"].startswith("public, max-age=")
+
+
+def test_if_none_match() -> None:
+    """A matching tag gives a 304, If-Modified-Since is then ignored."""
+    etag = respond().headers["etag"]
+
+    response = respond(if_none_match=f'"other", W/{etag}')
+    assert response.status_code == 304
+    assert not response.body
+    assert response.headers["etag"] == etag
+
+    response = respond(
+        if_none_match='"other"',
+        if_modified_since="Sun, 13 Nov 2022 11:15:30 GMT",
+    )
+    assert response.status_code == 200
+
+
+def test_if_modified_since() -> None:
+    """Responses not modified since the given time give a 304."""
+    assert respond(if_modified_since="Sun, 13 Nov 2022 11:15:30 GMT").status_code == 304
+    assert respond(if_modified_since="Sun, 13 Nov 2022 11:15:29 GMT").status_code == 200
+    assert respond(if_modified_since="not a date").status_code == 200
@@ -0,0 +1,106 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from tnsquery.backfill import backfill_ebv
+from tnsquery.db.models.transient_model import ATModel
+from tnsquery.services.dust import SFDMap
+from tnsquery.settings import settings
+
+# Galactic north and south poles in equatorial coordinates.
+NGP = (192.85948, 27.12825)
+SGP = (12.85948, -27.12825)
+
+
+def write_hemisphere(path: Path, sign: int, data: np.ndarray) -> None:
+    """Write a tiny SFD-like FITS image."""
+    height, width = data.shape
+    cards = [
+        "SIMPLE  =                    T",
+        "BITPIX  =                  -32",
+        "NAXIS   =                    2",
+        f"NAXIS1  = {width:>20}",
+        f"NAXIS2  = {height:>20}",
+        f"CRPIX1  = {(width + 1) / 2:>20}",
+        f"CRPIX2  = {(height + 1) / 2:>20}",
+        f"LAM_NSGP= {sign:>20} / 1 for north, -1 for south",
+        f"LAM_SCAL= {width / 2:>20}",
+        "END",
+    ]
+    header = "".join(card.ljust(80) for card in cards)
+    header = header.ljust(-(-len(header) // 2880) * 2880)
+    path.write_bytes(header.encode("ascii") + data.astype(">f4").tobytes())
+
+
+@pytest.fixture
+def dust_map(tmp_path: Path) -> SFDMap:
+    """SFD map whose values grow along x, offset by 100 in the south."""
+    gradient = np.tile(np.arange(8, dtype=float), (8, 1))
+    write_hemisphere(tmp_path / "SFD_dust_4096_ngp.fits", 1, gradient)
+    write_hemisphere(tmp_path / "SFD_dust_4096_sgp.fits", -1, gradient + 100)
+    return SFDMap(tmp_path, scale=1)
+
+
+def test_poles_map_to_image_centers(dust_map: SFDMap) -> None:
+    """Galactic poles fall on the interpolated center pixel of their hemisphere."""
+    ebv = dust_map.ebv([NGP[0], SGP[0]], [NGP[1], SGP[1]])
+    assert ebv == pytest.approx([3.5, 103.5], abs=1e-3)
+
+
+def test_galactic_plane_is_on_the_image_edge(dust_map: SFDMap) -> None:
+    """The galactic center (l=0, b=0) is read at the right edge of the north map."""
+    galactic_center = (266.40499, -28.93617)
+    ebv = dust_map.ebv(*galactic_center)
+    assert float(ebv) == pytest.approx(7, abs=0.01)
+
+
+@pytest.mark.anyio
+async def test_backfill_fills_missing_ebv(
+    dust_map: SFDMap,
+    tmp_path: Path,
+    _engine: AsyncEngine,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """The backfill sets E(B-V) from the dust map only where it is missing."""
+    monkeypatch.setattr(settings, "dust_map_scale", 1)
+    rows = [
+        {"name": f"2022ab{letter}", "ra": NGP[0], "dec": NGP[1], "ebv": ebv}
+        for letter, ebv in zip("cdefg", (None, 0, 0.5, 0, None))
+    ]
+    async with _engine.begin() as conn:
+        await conn.execute(ATModel.__table__.insert(), rows)
+    try:
+        updated = await backfill_ebv(tmp_path, chunk_size=2, workers=2)
+        async with _engine.connect() as conn:
+            rows = await conn.execute(select(ATModel.name, ATModel.ebv).order_by(ATModel.name))
+            stored = dict(rows.all())
+    finally:
+        async with _engine.begin() as conn:  # noqa: WPS440
+            await conn.execute(delete(ATModel))
+
+    assert updated == 4
+    assert stored.pop("2022abe") == 0.5
+    assert list(stored.values()) == pytest.approx([3.5] * 4, abs=1e-3)
+
+
+@pytest.mark.anyio
+async def test_positions_outside_the_sky_are_rejected(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    dust_map: SFDMap,
+) -> None:
+    """NaN and out of range positions are a 422, not a failed lookup."""
+    fastapi_app.state.dust_map = dust_map
+    url = fastapi_app.url_path_for("get_ebvs")
+
+    valid = await client.post(url, json={"ra": [NGP[0]], "dec": [NGP[1]]})
+    assert valid.status_code == 200
+    assert valid.json()["ebv"] == pytest.approx([3.5], abs=1e-3)
+    for ra, dec in ((float("nan"), 0), (0, float("nan")), (360, 0), (0, -91), (-1, 0)):
+        response = await client.post(url, json={"ra": [10, ra], "dec": [20, dec]})
+        assert response.status_code == 422
@@ -0,0 +1,40 @@
+import json
+
+from tnsquery.db.models.transient_model import Transient
+from tnsquery.db.notifications import CHANNEL, MAX_PAYLOAD, decode, encode
+from tnsquery.services.cache import CachedTransient, TransientCache, TTLCache
+from tnsquery.services.invalidation import CacheInvalidator
+
+
+def test_payloads_stay_below_the_notify_limit() -> None:
+    """Many changed names are split over payloads Postgres accepts."""
+    names = [f"2022{index:05d}" for index in range(3000)]
+    payloads = encode(names, origin="host:1")
+
+    assert len(payloads) > 1
+    assert all(len(payload) < MAX_PAYLOAD for payload in payloads)
+    decoded = [decode(payload) for payload in payloads]
+    assert [name for message in decoded for name in message.names] == names
+    assert {message.origin for message in decoded} == {"host:1"}
+    assert decode("not json") is None
+
+
+def test_other_workers_changes_are_dropped() -> None:
+    """Notifications of other workers invalidate, this worker's own are skipped."""
+    cache = TransientCache(maxsize=10, ttl=10)
+    negative_cache: TTLCache[str, bool] = TTLCache(maxsize=10, ttl=10)
+    invalidator = CacheInvalidator(None, cache, negative_cache)  # type: ignore
+    transient = Transient(name="2022abc", redshift=0, ra=1, dec=2, ebv=0)
+    cache.put("SN2022abc", CachedTransient(transient))
+    cache.put("2022abc", CachedTransient(transient))
+    negative_cache.put("2022xyz", True)
+
+    own = json.dumps({"origin": invalidator.origin, "names": ["2022abc"]})
+    invalidator.on_notification(None, 1, CHANNEL, own)
+    assert len(cache) == 2
+
+    (other,) = encode(["2022abc", "2022xyz"], origin="elsewhere:1")
+    invalidator.on_notification(None, 1, CHANNEL, other)
+    assert not len(cache)
+    assert not len(negative_cache)
+    assert invalidator.stats()["invalidated"] == 2
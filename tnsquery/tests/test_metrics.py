@@ -0,0 +1,45 @@
+from tnsquery.services.metrics import Counter, Gauge, Histogram, render
+
+
+def test_histogram_buckets_are_cumulative() -> None:
+    """Bucket counts include every smaller bucket, bounds are inclusive."""
+    histogram = Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 5):
+        histogram.observe(value, "/api/health")
+
+    assert list(histogram.samples()) == [
+        'latency_seconds_bucket{route="/api/health",le="0.1"} 2',
+        'latency_seconds_bucket{route="/api/health",le="1.0"} 3',
+        'latency_seconds_bucket{route="/api/health",le="+Inf"} 4',
+        'latency_seconds_sum{route="/api/health"} 5.65',
+        'latency_seconds_count{route="/api/health"} 4',
+    ]
+
+
+def test_timer_observes_once() -> None:
+    """Timing a block records one observation."""
+    histogram = Histogram("stage_seconds", "Stage.", ("stage",))
+    with histogram.time("db"):
+        pass  # noqa: WPS420
+
+    assert list(histogram.samples())[-1] == 'stage_seconds_count{stage="db"} 1'
+
+
+def test_render() -> None:
+    """Metrics are rendered with their help and type."""
+    counter = Counter("responses_total", "Responses.", ("status",))
+    counter.inc("200")
+    counter.inc("200")
+    counter.inc('a"b')
+    gauge = Gauge("pool_size", "Pool size.")
+    gauge.set(5)
+
+    assert render([counter, gauge]) == (
+        "# HELP responses_total Responses.\n"
+        "# TYPE responses_total counter\n"
+        'responses_total{status="200"} 2\n'
+        'responses_total{status="a\\"b"} 1\n'
+        "# HELP pool_size Pool size.\n"
+        "# TYPE pool_size gauge\n"
+        "pool_size 5\n"
+    )
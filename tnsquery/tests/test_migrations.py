@@ -0,0 +1,17 @@
+from pathlib import Path
+
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+
+import tnsquery
+from tnsquery.db.utils import DB_REVISION
+
+
+def test_db_revision_is_the_latest_migration() -> None:
+    """The revision checked on startup must be bumped with every migration."""
+    config = Config()
+    config.set_main_option(
+        "script_location",
+        str(Path(tnsquery.__file__).parent / "db" / "migrations"),
+    )
+    assert ScriptDirectory.from_config(config).get_current_head() == DB_REVISION
@@ -0,0 +1,28 @@
+import pytest
+
+from tnsquery.db.names import is_iau_name, normalize_name
+
+
+@pytest.mark.parametrize(
+    "name, normalized",
+    [
+        ("2022abc", "2022abc"),
+        ("SN 2022abc", "2022abc"),
+        ("AT2022ABC", "2022abc"),
+        (" at 2022abc ", "2022abc"),
+        ("SN1987a", "1987A"),
+        ("ZTF22abcdefg", "ztf22abcdefg"),
+        ("ATLAS 22xyz", "atlas22xyz"),
+        ("PS1-22abc", "ps1-22abc"),
+    ],
+)
+def test_normalize_name(name: str, normalized: str) -> None:
+    """Equivalent spellings normalize to the same name."""
+    assert normalize_name(name) == normalized
+
+
+def test_is_iau_name() -> None:
+    """IAU designations are told apart from survey internal names."""
+    assert is_iau_name("SN 2022abc")
+    assert not is_iau_name("ZTF22abcdefg")
+    assert not is_iau_name("ATLAS22xyz")
@@ -0,0 +1,46 @@
+from pathlib import Path
+
+import pytest
+
+from tnsquery.conftest import FakeClock
+from tnsquery.services.ratelimit import SharedTokenBucket, TNSRateLimitError
+
+
+def test_bucket_is_shared_through_state_file(tmp_path: Path, clock: FakeClock) -> None:
+    """Two buckets on the same file draw from one quota."""
+    path = tmp_path / "ratelimit"
+    first = SharedTokenBucket(path, capacity=2, period=60, timer=clock)
+    second = SharedTokenBucket(path, capacity=2, period=60, timer=clock)
+
+    assert first.try_acquire() == 0
+    assert second.try_acquire() == 0
+    assert first.try_acquire() == pytest.approx(30)
+
+    clock.now += 30
+    assert second.try_acquire() == 0
+
+
+def test_bucket_follows_tns_headers(tmp_path: Path, clock: FakeClock) -> None:
+    """An exhausted quota reported by TNS blocks until its reset."""
+    bucket = SharedTokenBucket(tmp_path / "ratelimit", capacity=10, period=60, timer=clock)
+
+    bucket.update_from_headers(
+        {"x-rate-limit-remaining": "0", "x-rate-limit-reset": "12"},
+        status_code=200,
+    )
+    assert bucket.try_acquire() == pytest.approx(12)
+
+    clock.now += 12
+    assert bucket.try_acquire() == 0
+
+
+@pytest.mark.anyio
+async def test_acquire_fails_fast(tmp_path: Path) -> None:
+    """Acquiring raises instead of waiting longer than max_wait."""
+    bucket = SharedTokenBucket(tmp_path / "ratelimit", capacity=1, period=60, max_wait=1)
+    await bucket.acquire()
+
+    with pytest.raises(TNSRateLimitError) as exc_info:
+        await bucket.acquire()
+    assert exc_info.value.retry_after > 1
+    assert bucket.stats()["rejected"] == 1
@@ -0,0 +1,102 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from tnsquery.conftest import FakeTNS
+from tnsquery.db.models.transient_model import ATModel, Transient
+from tnsquery.services.cache import CachedTransient, TransientCache
+from tnsquery.services.refresh import TransientRefresher
+from tnsquery.services.singleflight import SingleFlight
+
+
+class FakeRefresher(TransientRefresher):
+    """Refresher counting fetches instead of calling TNS."""
+
+    fetches = 0
+
+    async def _fetch_and_store(self, name: str) -> CachedTransient:
+        self.fetches += 1
+        await asyncio.sleep(0.01)
+        transient = Transient(name=name, redshift=0.1, ra=1, dec=2, ebv=0.01)
+        self.cache.refresh(transient, datetime.utcnow())
+        return CachedTransient(transient, datetime.utcnow())
+
+
+def make_refresher(max_age: timedelta = timedelta(days=1)) -> FakeRefresher:
+    return FakeRefresher(
+        engine=create_async_engine("postgresql+asyncpg://localhost/tnsquery"),
+        tns=None,  # type: ignore
+        flight=SingleFlight(),
+        cache=TransientCache(maxsize=10, ttl=60),
+        max_age=max_age,
+    )
+
+
+def test_staleness() -> None:
+    """Rows never fetched or older than max_age are stale."""
+    refresher = make_refresher()
+    now = datetime.utcnow()
+
+    assert refresher.is_stale(ATModel(name="2022abc", fetched_at=None))
+    assert refresher.is_stale(ATModel(name="2022abc", fetched_at=now - timedelta(days=2)))
+    assert not refresher.is_stale(ATModel(name="2022abc", fetched_at=now))
+    assert not make_refresher(timedelta(0)).is_stale(ATModel(name="2022abc"))
+
+
+@pytest.mark.anyio
+async def test_refreshes_are_deduplicated() -> None:
+    """A name is refreshed once however often it is scheduled meanwhile."""
+    refresher = make_refresher()
+
+    assert refresher.schedule("2022abc")
+    assert not refresher.schedule("2022abc")
+    await asyncio.sleep(0.05)
+
+    assert refresher.fetches == 1
+    assert refresher.cache.get("2022abc") is not None
+    assert refresher.stats() == {
+        "scheduled": 1,
+        "refreshed": 1,
+        "failed": 0,
+        "in_flight": 0,
+    }
+
+
+@pytest.mark.anyio
+async def test_refresh_keeps_edited_fields(_engine: AsyncEngine, fake_tns: FakeTNS) -> None:
+    """A refresh updates the TNS data but not a redshift or ebv set by hand."""
+    fake_tns.add("2022abc", redshift=0.1, ra=11, dec=21)
+    refresher = TransientRefresher(
+        engine=_engine,
+        tns=fake_tns.api(),
+        flight=SingleFlight(),
+        cache=TransientCache(maxsize=10, ttl=60),
+        max_age=timedelta(days=1),
+    )
+    async with _engine.begin() as conn:
+        await conn.execute(
+            ATModel.__table__.insert().values(
+                name="2022abc",
+                redshift=0.1886,
+                redshift_manual=True,
+                ra=10,
+                dec=20,
+                ebv=0.05,
+            ),
+        )
+    try:
+        assert refresher.schedule("2022abc")
+        await asyncio.gather(*refresher._tasks.values())  # noqa: WPS437
+        async with _engine.connect() as conn:
+            stored = (await conn.execute(select(ATModel.__table__))).one()
+    finally:
+        async with _engine.begin() as conn:  # noqa: WPS440
+            await conn.execute(delete(ATModel))
+
+    assert refresher.stats()["refreshed"] == 1
+    assert (stored.redshift, stored.ebv, stored.ra, stored.dec) == (0.1886, 0.05, 11, 21)
+    assert stored.fetched_at is not None
+    assert refresher.cache.get("2022abc").transient.redshift == 0.1886
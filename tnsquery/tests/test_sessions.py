@@ -0,0 +1,56 @@
+import asyncio
+from typing import AsyncGenerator
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy import delete
+
+from tnsquery.conftest import FakeTNS
+from tnsquery.db.models.transient_alias_model import TransientAliasModel
+from tnsquery.db.models.transient_model import ATModel
+from tnsquery.settings import settings
+from tnsquery.web.lifetime import _setup_db
+
+
+@pytest.fixture
+async def pooled_app(
+    fastapi_app: FastAPI,
+    monkeypatch: pytest.MonkeyPatch,
+) -> AsyncGenerator[FastAPI, None]:
+    """
+    The application on real sessions from a pool of two connections.
+
+    Rows written through it are committed, they are deleted afterwards.
+    """
+    monkeypatch.setattr(settings, "db_pool_size", 2)
+    monkeypatch.setattr(settings, "db_max_overflow", 0)
+    monkeypatch.setattr(settings, "db_pool_timeout", 0.5)
+    monkeypatch.setattr(settings, "metrics_enabled", False)
+    fastapi_app.dependency_overrides.clear()
+    _setup_db(fastapi_app)
+    engine = fastapi_app.state.db_engine
+    try:
+        yield fastapi_app
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(delete(TransientAliasModel))
+            await conn.execute(delete(ATModel))
+        await engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_concurrent_misses_do_not_exhaust_the_pool(
+    pooled_app: FastAPI,
+    fake_tns: FakeTNS,
+) -> None:
+    """Requests waiting on a shared TNS lookup hold no connection meanwhile."""
+    fake_tns.add("2022abc")
+    fake_tns.delay = 1
+    async with AsyncClient(app=pooled_app, base_url="http://test") as client:
+        responses = await asyncio.gather(
+            *(client.get("/api/transient/2022abc") for _ in range(30)),
+        )
+
+    assert [response.status_code for response in responses] == [200] * 30
+    assert fake_tns.requests == ["2022abc"]
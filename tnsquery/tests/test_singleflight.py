@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+from tnsquery.services.singleflight import SingleFlight
+
+
+@pytest.mark.anyio
+async def test_concurrent_calls_are_coalesced() -> None:
+    """Concurrent calls for one key share a single execution."""
+    flight = SingleFlight()
+    executions = 0
+
+    async def fetch() -> str:
+        nonlocal executions
+        executions += 1
+        await asyncio.sleep(0.01)
+        return "2022abc"
+
+    results = await asyncio.gather(*(flight.do("2022abc", fetch) for _ in range(5)))
+
+    assert results == ["2022abc"] * 5
+    assert executions == 1
+    assert flight.stats() == {
+        "calls": 5,
+        "executions": 1,
+        "deduplicated": 4,
+        "in_flight": 0,
+    }
+
+
+@pytest.mark.anyio
+async def test_errors_are_shared_and_not_cached() -> None:
+    """A failed call raises for every waiter and is retried afterwards."""
+    flight = SingleFlight()
+
+    async def fail() -> str:
+        await asyncio.sleep(0.01)
+        raise ValueError("Transient not found: 2022xyz")
+
+    results = await asyncio.gather(
+        flight.do("2022xyz", fail),
+        flight.do("2022xyz", fail),
+        return_exceptions=True,
+    )
+    assert all(isinstance(res, ValueError) for res in results)
+    assert not flight.in_flight("2022xyz")
+
+    with pytest.raises(ValueError):
+        await flight.do("2022xyz", fail)
+    assert flight.executions == 2
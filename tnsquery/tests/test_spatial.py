@@ -0,0 +1,35 @@
+import random
+
+import pytest
+
+from tnsquery.db.spatial import (
+    angular_separation,
+    cone_ra_ranges,
+    cone_zones,
+    dec_zone,
+)
+
+
+def test_angular_separation() -> None:
+    """Known separations are reproduced."""
+    assert angular_separation(10, 0, 20, 0) == pytest.approx(10)
+    assert angular_separation(0, 89, 180, 89) == pytest.approx(2)
+    assert angular_separation(359.5, 0, 0.5, 0) == pytest.approx(1)
+
+
+@pytest.mark.parametrize(
+    "ra, dec, radius",
+    [(0.1, 0, 1), (359.9, 45, 2), (180, -89.5, 1), (42, 60, 0.01), (300, 85, 4)],
+)
+def test_cone_index_ranges_contain_all_matches(ra: float, dec: float, radius: float) -> None:
+    """Every position inside the cone falls in one of the scanned ranges."""
+    rng = random.Random(42)
+    zones = set(cone_zones(dec, radius))
+    ra_ranges = cone_ra_ranges(ra, dec, radius)
+    for _ in range(5000):
+        point_ra = (ra + rng.uniform(-30, 30)) % 360
+        point_dec = max(-90, min(90, dec + rng.uniform(-radius, radius)))
+        if angular_separation(ra, dec, point_ra, point_dec) > radius:
+            continue
+        assert dec_zone(point_dec) in zones
+        assert any(low <= point_ra <= high for low, high in ra_ranges)
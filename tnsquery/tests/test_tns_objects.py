@@ -0,0 +1,37 @@
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from tnsquery.services.tns_objects import iter_public_object_chunks
+
+CSV = (
+    '"2022-11-13 00:00:00"\n'
+    '"objid","name_prefix","name","ra","declination","redshift","internal_names"\n'
+    '"1","SN","2022abc","10.5","-20.25","0.031","ZTF22aaaaaaa, ATLAS22abc"\n'
+    '"2","AT","2022abd","200.0","45.0","",""\n'
+    '"3","AT","2022abe","300.0","0.0","",""\n'
+)
+
+
+@pytest.mark.parametrize("zipped", [False, True])
+def test_public_objects_are_read_in_chunks(tmp_path: Path, zipped: bool) -> None:
+    """Plain and zipped files are parsed into chunks of transients."""
+    path = tmp_path / "tns_public_objects.csv"
+    path.write_text(CSV)
+    if zipped:
+        archive = tmp_path / "tns_public_objects.csv.zip"
+        with zipfile.ZipFile(archive, "w") as zipped_file:
+            zipped_file.write(path, arcname=path.name)
+        path = archive
+
+    chunks = list(iter_public_object_chunks(path, chunk_size=2))
+
+    assert [len(chunk.transients) for chunk in chunks] == [2, 1]
+    first = chunks[0].transients[0]
+    assert (first.name, first.ra, first.dec, first.redshift) == ("2022abc", 10.5, -20.25, 0.031)
+    assert chunks[0].transients[1].redshift == 0
+    assert chunks[0].aliases == {
+        "2022abc": ["ZTF22aaaaaaa", "ATLAS22abc"],
+        "2022abd": [],
+    }
@@ -0,0 +1,64 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from tnsquery.db.dao.transient_dao import TransientDAO
+from tnsquery.db.models.transient_model import Transient
+
+
+@pytest.mark.anyio
+async def test_upsert_keeps_manual_redshift(dbsession: AsyncSession) -> None:
+    """A redshift set by hand survives later fetches, other TNS data does not."""
+    dao = TransientDAO(dbsession)
+    await dao.upsert_transients(
+        [
+            Transient(name="2022abc", redshift=0.1, ra=10, dec=20, ebv=0.05),
+            Transient(name="2022abd", redshift=0.1, ra=10, dec=20, ebv=0.05),
+        ],
+    )
+    edited = await dao.get_transient("2022abc")
+    edited.redshift = 0.1886  # type: ignore
+    edited.redshift_manual = True  # type: ignore
+    await dbsession.flush()
+
+    upserted = await dao.upsert_transients(
+        [
+            Transient(name="2022abc", redshift=0.2, ra=11, dec=21, ebv=0.07),
+            Transient(name="2022abd", redshift=0.2, ra=11, dec=21, ebv=0.07),
+        ],
+    )
+
+    stored = {at.name: at for at in upserted}
+    assert stored["2022abc"].redshift == 0.1886
+    assert stored["2022abc"].ra == 11
+    assert stored["2022abc"].ebv == 0.05
+    assert stored["2022abd"].redshift == 0.2
+    assert not stored["2022abd"].redshift_manual
+
+
+@pytest.mark.anyio
+async def test_missing_ebv_pages_and_set_ebvs(dbsession: AsyncSession) -> None:
+    """Only positions without E(B-V) are paged through, set_ebvs fills them in."""
+    dao = TransientDAO(dbsession)
+    upserted = await dao.upsert_transients(
+        [
+            Transient(name=f"2022ab{letter}", redshift=0.1, ra=10, dec=20, ebv=ebv)
+            for letter, ebv in zip("cdefg", (0, 0.05, 0, 0, 0))
+        ],
+    )
+    ids = {at.name: at.id for at in upserted}
+
+    first = await dao.get_missing_ebv(limit=2)
+    second = await dao.get_missing_ebv(limit=2, after_id=first[-1][0])
+    assert [row[0] for row in first + second] == [
+        ids[name] for name in ("2022abc", "2022abe", "2022abf", "2022abg")
+    ]
+    assert first[0][1:] == (10, 20)
+
+    await dao.set_ebvs({ids["2022abc"]: 0.01, ids["2022abe"]: 0.02})
+    dbsession.expire_all()
+
+    assert [row[0] for row in await dao.get_missing_ebv(limit=10)] == [
+        ids["2022abf"],
+        ids["2022abg"],
+    ]
+    assert (await dao.get_transient("2022abe")).ebv == 0.02  # type: ignore
@@ -0,0 +1,195 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from tnsquery.conftest import FakeClock, FakeTNS
+from tnsquery.db.dao.transient_dao import TransientDAO
+from tnsquery.db.models.transient_model import Transient
+from tnsquery.services.cache import TTLCache
+from tnsquery.settings import settings
+
+
+@pytest.mark.anyio
+async def test_batch_shares_tns_requests_with_single_lookups(
+    client: AsyncClient,
+    fake_tns: FakeTNS,
+) -> None:
+    """A batch and a single lookup of the same name send one TNS request."""
+    fake_tns.add("2022abc", redshift=0.05)
+    fake_tns.delay = 0.2
+
+    single, batch = await asyncio.gather(
+        client.get("/api/transient/2022abc"),
+        client.post("/api/transients/batch", json={"names": ["SN 2022abc"]}),
+    )
+
+    assert single.status_code == batch.status_code == 200
+    assert single.json()["redshift"] == 0.05
+    assert batch.json()["found"]["SN 2022abc"]["redshift"] == 0.05
+    assert fake_tns.requests == ["2022abc"]
+
+
+@pytest.mark.anyio
+async def test_unknown_names_are_not_asked_again(
+    client: AsyncClient,
+    fake_tns: FakeTNS,
+) -> None:
+    """A name TNS did not know is answered with a 404 without asking TNS again."""
+    first = await client.get("/api/transient/2022zzz")
+    second = await client.get("/api/transient/SN2022zzz")
+
+    assert first.status_code == second.status_code == 404
+    assert fake_tns.requests == ["2022zzz"]
+
+
+@pytest.mark.anyio
+async def test_unknown_names_are_asked_again_after_ttl(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    fake_tns: FakeTNS,
+    clock: FakeClock,
+) -> None:
+    """Not found results expire, TNS may know the name by then."""
+    fastapi_app.state.negative_cache = TTLCache(maxsize=10, ttl=60, timer=clock)
+    assert (await client.get("/api/transient/2022zzz")).status_code == 404
+
+    fake_tns.add("2022zzz")
+    clock.now += 60
+
+    assert (await client.get("/api/transient/2022zzz")).status_code == 200
+    assert fake_tns.requests == ["2022zzz", "2022zzz"]
+
+
+@pytest.mark.anyio
+async def test_force_tns_bypasses_the_negative_cache(
+    client: AsyncClient,
+    fake_tns: FakeTNS,
+) -> None:
+    """force_tns asks TNS even for names it did not know, and forgets they were missing."""
+    assert (await client.get("/api/transient/2022zzz")).status_code == 404
+
+    fake_tns.add("2022zzz")
+    forced = await client.get("/api/transient/2022zzz", params={"force_tns": True})
+    again = await client.get("/api/transient/2022zzz")
+
+    assert forced.status_code == again.status_code == 200
+    assert fake_tns.requests == ["2022zzz", "2022zzz"]
+
+
+@pytest.mark.anyio
+async def test_batch_lists_unknown_names_as_not_found(
+    client: AsyncClient,
+    fake_tns: FakeTNS,
+) -> None:
+    """Batches use and fill the same not found results as single lookups."""
+    fake_tns.add("2022abc")
+    assert (await client.get("/api/transient/2022zzz")).status_code == 404
+
+    first = await client.post(
+        "/api/transients/batch",
+        json={"names": ["2022abc", "SN 2022zzz", "2022zzy"]},
+    )
+    second = await client.post("/api/transients/batch", json={"names": ["2022zzy"]})
+
+    assert set(first.json()["found"]) == {"2022abc"}
+    assert sorted(first.json()["not_found"]) == ["2022zzy", "SN 2022zzz"]
+    assert second.json()["not_found"] == ["2022zzy"]
+    assert sorted(fake_tns.requests) == ["2022abc", "2022zzy", "2022zzz"]
+
+
+@pytest.mark.anyio
+async def test_not_found_results_are_shared_through_the_database(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    fake_tns: FakeTNS,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """With negative_cache_db, workers without the name cached do not ask TNS either."""
+    monkeypatch.setattr(settings, "negative_cache_db", True)
+    assert (await client.get("/api/transient/2022zzz")).status_code == 404
+
+    # Another worker, whose negative cache is empty.
+    fastapi_app.state.negative_cache.clear()
+
+    assert (await client.get("/api/transient/2022zzz")).status_code == 404
+    assert fake_tns.requests == ["2022zzz"]
+
+
+async def _store_transients(dbsession: AsyncSession, count: int, first: int = 0) -> list[str]:
+    names = [f"2022a{number:05d}" for number in range(first, first + count)]
+    await TransientDAO(dbsession).upsert_transients(
+        [Transient(name=name, redshift=0.1, ra=10, dec=20, ebv=0) for name in names],
+        returning=False,
+    )
+    return names
+
+
+@pytest.mark.anyio
+async def test_cursor_pages_have_no_gaps_or_duplicates(
+    client: AsyncClient,
+    dbsession: AsyncSession,
+) -> None:
+    """Following next_cursor lists every row once, rows added meanwhile included."""
+    stored = await _store_transients(dbsession, 10)
+
+    listed: list[str] = []
+    cursor = None
+    while True:  # noqa: WPS457
+        params = {"limit": 3} if cursor is None else {"limit": 3, "cursor": cursor}
+        page = (await client.get("/api/transients", params=params)).json()
+        listed.extend(item["name"] for item in page["items"])
+        if len(listed) == 3:
+            stored += await _store_transients(dbsession, 2, first=10)
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert listed == stored
+
+
+@pytest.mark.anyio
+async def test_ndjson_has_one_object_per_line(
+    client: AsyncClient,
+    dbsession: AsyncSession,
+) -> None:
+    """Every row is one JSON object on its own line, across fetch batches."""
+    stored = await _store_transients(dbsession, 2500)
+
+    response = await client.get("/api/transients/ndjson")
+
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.text.endswith("\n")
+    lines = response.text.splitlines()
+    assert [json.loads(line)["name"] for line in lines] == stored
+    assert set(json.loads(lines[0])) == {"name", "redshift", "ra", "dec", "ebv"}
+
+
+@pytest.mark.anyio
+async def test_patch_commits_before_updating_the_cache(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    fake_tns: FakeTNS,
+    dbsession: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """The cache only gets a PATCHed value once it is committed."""
+    fake_tns.add("2022abc", redshift=0.1)
+    assert (await client.get("/api/transient/2022abc")).status_code == 200
+    cache = fastapi_app.state.transient_cache
+    cached_at_commit = []
+    commit = dbsession.commit
+
+    async def recording_commit() -> None:
+        cached_at_commit.append(cache.get("2022abc").transient.redshift)
+        await commit()
+
+    monkeypatch.setattr(dbsession, "commit", recording_commit)
+    patched = await client.patch("/api/transient/2022abc/redshift", params={"redshift": 0.3})
+
+    assert patched.status_code == 200
+    assert cached_at_commit[0] == 0.1
+    assert cache.get("2022abc").transient.redshift == 0.3
@@ -0,0 +1,142 @@
+import asyncio
+from typing import AsyncGenerator, Dict, List
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from tnsquery.conftest import FakeTNS
+from tnsquery.db.models.transient_alias_model import TransientAliasModel
+from tnsquery.db.models.transient_model import ATModel, Transient
+from tnsquery.services.writebehind import PendingTransient, WriteBehindQueue
+
+
+class FakeQueue(WriteBehindQueue):
+    """Queue recording batches instead of writing them to the database."""
+
+    fail = False
+
+    def __init__(self, **kwargs: float) -> None:
+        super().__init__(create_async_engine("postgresql+asyncpg://localhost/tnsquery"), **kwargs)
+        self.batches: List[List[str]] = []
+
+    async def _store(self, batch: Dict[str, PendingTransient]) -> None:
+        await asyncio.sleep(0)
+        if self.fail:
+            raise ConnectionError("database is down")
+        self.batches.append(list(batch))
+
+
+def make_transient(name: str) -> Transient:
+    return Transient(name=name, redshift=0.1, ra=1, dec=2, ebv=0.01)
+
+
+@pytest.mark.anyio
+async def test_queued_transients_are_served_until_stored() -> None:
+    """Reads by name or alias see queued transients, failed flushes keep them."""
+    queue = FakeQueue(interval=60)
+    entry = await queue.add(make_transient("2022abc"), ["ZTF22aaaaaaa"])
+
+    assert queue.get("2022abc") == entry
+    assert queue.get("ztf22aaaaaaa") == entry
+
+    queue.fail = True
+    with pytest.raises(ConnectionError):
+        await queue.flush()
+    assert queue.get("ztf22aaaaaaa") == entry
+
+    queue.fail = False
+    assert await queue.flush() == 1
+    assert queue.get("2022abc") is None
+    assert queue.get("ztf22aaaaaaa") is None
+    assert queue.stats() == {"queued": 1, "flushed": 1, "flushes": 1, "failed": 1, "pending": 0}
+
+
+@pytest.mark.anyio
+async def test_batches_are_flushed_when_full_and_on_close() -> None:
+    """max_rows waiting transients are written at once, the rest on shutdown."""
+    queue = FakeQueue(interval=60, max_rows=2)
+    queue.start()
+    await queue.add(make_transient("2022a"), [])
+    await queue.add(make_transient("2022b"), [])
+    await asyncio.sleep(0.01)
+    assert queue.batches == [["2022a", "2022b"]]
+
+    await queue.add(make_transient("2022c"), [])
+    await queue.aclose()
+    assert queue.batches == [["2022a", "2022b"], ["2022c"]]
+
+
+@pytest.fixture
+async def write_behind(
+    fastapi_app: FastAPI,
+    _engine: AsyncEngine,
+) -> AsyncGenerator[WriteBehindQueue, None]:
+    """
+    Write-behind queue of the application, flushed only when asked to.
+
+    Flushed rows are committed, they are deleted afterwards.
+    """
+    queue = WriteBehindQueue(_engine, interval=60)
+    fastapi_app.state.write_behind = queue
+    try:
+        yield queue
+    finally:
+        async with _engine.begin() as conn:
+            await conn.execute(delete(TransientAliasModel))
+            await conn.execute(delete(ATModel))
+
+
+async def stored_redshift(engine: AsyncEngine, name: str) -> List[float]:
+    async with engine.connect() as conn:
+        rows = await conn.execute(select(ATModel.redshift).where(ATModel.name == name))
+        return list(rows.scalars())
+
+
+@pytest.mark.anyio
+async def test_queued_transients_are_stored_before_updates(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    fake_tns: FakeTNS,
+    write_behind: WriteBehindQueue,
+    _engine: AsyncEngine,
+) -> None:
+    """Reads are served from the queue, a PATCH stores the queued row first."""
+    fake_tns.add("2022abc", redshift=0.1, internal_names="ZTF22aaaaaaa")
+    assert (await client.get("/api/transient/2022abc")).status_code == 200
+    assert await stored_redshift(_engine, "2022abc") == []
+
+    fastapi_app.state.transient_cache.clear()
+    by_alias = await client.get("/api/transient/ZTF22aaaaaaa")
+    assert by_alias.json()["name"] == "2022abc"
+    assert fake_tns.requests == ["2022abc"]
+
+    patched = await client.patch("/api/transient/2022abc/redshift", params={"redshift": 0.3})
+
+    assert patched.status_code == 200
+    assert patched.json()["redshift"] == 0.3
+    # Flushed and committed, the PATCH itself stays in the test transaction.
+    assert await stored_redshift(_engine, "2022abc") == [0.1]
+    assert write_behind.stats()["pending"] == 0
+
+
+@pytest.mark.anyio
+async def test_queued_transients_are_stored_on_shutdown(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    fake_tns: FakeTNS,
+    write_behind: WriteBehindQueue,
+    _engine: AsyncEngine,
+) -> None:
+    """Shutting down stores what is still waiting in the queue."""
+    fake_tns.add("2022abc")
+    assert (await client.get("/api/transient/2022abc")).status_code == 200
+    fastapi_app.state.sync_task = None
+
+    for shutdown in fastapi_app.router.on_shutdown:
+        await shutdown()
+
+    assert await stored_redshift(_engine, "2022abc") == [0.1]
+    assert write_behind.stats()["flushed"] == 1
@@ -0,0 +1,4 @@
+"""API for looking up Galactic extinction."""
+from tnsquery.web.api.dust.views import router
+
+__all__ = ["router"]
@@ -0,0 +1,37 @@
+from pydantic import BaseModel, confloat, conlist, root_validator
+
+from tnsquery.settings import settings
+
+
+class EBVRequest(BaseModel):
+    """Positions to look up E(B-V) for, in degrees."""
+
+    ra: conlist(  # type: ignore
+        confloat(ge=0, lt=360),  # type: ignore
+        min_items=1,
+        max_items=settings.batch_max_names,
+    )
+    dec: conlist(  # type: ignore
+        confloat(ge=-90, le=90),  # type: ignore
+        min_items=1,
+        max_items=settings.batch_max_names,
+    )
+
+    @root_validator(skip_on_failure=True)
+    def same_length(cls, values: dict) -> dict:  # noqa: N805
+        """
+        Check that every ra has a dec.
+
+        :param values: validated fields.
+        :raises ValueError: if ra and dec differ in length.
+        :return: the fields unchanged.
+        """
+        if len(values["ra"]) != len(values["dec"]):
+            raise ValueError("ra and dec must have the same length")
+        return values
+
+
+class EBVResponse(BaseModel):
+    """E(B-V) of each requested position, in magnitudes."""
+
+    ebv: list[float]
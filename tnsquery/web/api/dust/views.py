@@ -0,0 +1,44 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.exceptions import HTTPException
+
+from tnsquery.services.dependencies import get_dust_map
+from tnsquery.services.dust import SFDMap
+from tnsquery.web.api.dust.schema import EBVRequest, EBVResponse
+
+router = APIRouter()
+
+
+def _require_dust_map(dust_map: Optional[SFDMap] = Depends(get_dust_map)) -> SFDMap:
+    if dust_map is None:
+        raise HTTPException(status_code=503, detail="No dust map is configured.")
+    return dust_map
+
+
+@router.get("/ebv", response_model=EBVResponse)
+async def get_ebv(
+    ra: float = Query(..., ge=0, lt=360),
+    dec: float = Query(..., ge=-90, le=90),
+    dust_map: SFDMap = Depends(_require_dust_map),
+) -> EBVResponse:
+    """
+    Get the Galactic E(B-V) at a position from the local SFD dust map.
+
+    Returns a 503 if the service has no dust map configured.
+    """
+    return EBVResponse(ebv=[float(dust_map.ebv(ra, dec))])
+
+
+@router.post("/ebv", response_model=EBVResponse)
+async def get_ebvs(
+    positions: EBVRequest,
+    dust_map: SFDMap = Depends(_require_dust_map),
+) -> EBVResponse:
+    """
+    Get the Galactic E(B-V) at many positions in one call.
+
+    Values are returned in the order of the requested positions.
+    """
+    ebv = dust_map.ebv(positions.ra, positions.dec)
+    return EBVResponse(ebv=ebv.tolist())
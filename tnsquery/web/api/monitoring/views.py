@@ -1,6 +1,13 @@
 from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
 from starlette import status
-from typing import Literal
+from starlette.datastructures import State
+from starlette.requests import Request
+from typing import Any, Literal
+
+from tnsquery.services.metrics import METRICS, Counter, Gauge, Metric, render
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"  # Starlette appends the charset
 
 router = APIRouter()
 
@@ -12,4 +19,109 @@ def health_check() -> Literal[200]:
     It returns 200 since the project is up and running.
     """
     stat = status.HTTP_200_OK
-    return stat
\ No newline at end of file
+    return stat
+
+
+@router.get("/stats")
+def stats(request: Request) -> dict[str, dict[str, float]]:
+    """
+    Runtime counters of this worker.
+
+    Reports how many TNS lookups were coalesced
+    into a call that was already in flight,
+    how well the transient and not found caches perform,
+    how many stale transients were refreshed in the background,
+    how many cached transients other workers invalidated,
+    how many fetched transients were stored in batches
+    and how much of the shared TNS quota is left.
+    """
+    state = request.app.state
+    stats = {
+        "tns_single_flight": state.tns_single_flight.stats(),
+        "transient_cache": state.transient_cache.stats(),
+        "negative_cache": state.negative_cache.stats(),
+        "transient_refresher": state.transient_refresher.stats(),
+    }
+    if state.write_behind is not None:
+        stats["write_behind"] = state.write_behind.stats()
+    if state.cache_invalidator is not None:
+        stats["cache_invalidator"] = state.cache_invalidator.stats()
+    if state.tns_api.rate_limiter is not None:
+        stats["tns_rate_limiter"] = state.tns_api.rate_limiter.stats()
+    if state.tns_api.breaker is not None:
+        stats["tns_circuit_breaker"] = state.tns_api.breaker.stats()
+    return stats
+
+
+@router.get("/tns/breaker")
+def tns_breaker(request: Request) -> dict[str, Any]:
+    """
+    State of the circuit breaker around TNS lookups of this worker.
+
+    While it is open, lookups that need TNS fail fast with a 503.
+    """
+    breaker = request.app.state.tns_api.breaker
+    if breaker is None:
+        return {"state": "disabled"}
+    return {"state": breaker.state, **breaker.stats()}
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics(request: Request) -> PlainTextResponse:
+    """
+    Metrics of this worker in the Prometheus text format.
+
+    Request latencies per route, time spent in the database,
+    on TNS and in serialization, TNS responses by status,
+    cache hits and database connection pool usage.
+    """
+    return PlainTextResponse(
+        render([*METRICS, *_state_metrics(request.app.state)]),
+        media_type=PROMETHEUS_CONTENT_TYPE,
+    )
+
+
+def _state_metrics(state: State) -> list[Metric]:
+    """Metrics read from the application state when scraped."""
+    pool = state.db_engine.sync_engine.pool
+    connections = Gauge(
+        "tnsquery_db_pool_connections",
+        "Connections of the database pool by state.",
+        ("state",),
+    )
+    if hasattr(pool, "checkedout"):
+        connections.set(pool.checkedout(), "checked_out")
+        connections.set(pool.checkedin(), "idle")
+        connections.set(max(pool.overflow(), 0), "overflow")
+    pool_size = Gauge("tnsquery_db_pool_size", "Configured size of the database pool.")
+    if hasattr(pool, "size"):
+        pool_size.set(pool.size())
+
+    lookups = Counter(
+        "tnsquery_cache_lookups_total",
+        "Cache lookups by cache and result.",
+        ("cache", "result"),
+    )
+    hit_ratio = Gauge("tnsquery_cache_hit_ratio", "Share of cache lookups that hit.", ("cache",))
+    entries = Gauge("tnsquery_cache_entries", "Entries held by a cache.", ("cache",))
+    for name, cache in (("transient", state.transient_cache), ("negative", state.negative_cache)):
+        stats = cache.stats()
+        lookups.set(stats["hits"], name, "hit")
+        lookups.set(stats["misses"], name, "miss")
+        total = stats["hits"] + stats["misses"]
+        hit_ratio.set(stats["hits"] / total if total else 0, name)
+        entries.set(stats["size"], name)
+
+    coalesced = Counter(
+        "tnsquery_tns_lookups_deduplicated_total",
+        "TNS lookups served by a lookup of the same name already in flight.",
+    )
+    coalesced.set(state.tns_single_flight.stats()["deduplicated"])
+
+    breaker_open = Gauge(
+        "tnsquery_tns_circuit_open",
+        "1 while the circuit breaker around TNS lookups is open or half open.",
+    )
+    if state.tns_api.breaker is not None:
+        breaker_open.set(state.tns_api.breaker.stats()["open"])
+    return [connections, pool_size, lookups, hit_ratio, entries, coalesced, breaker_open]
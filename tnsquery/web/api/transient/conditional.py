@@ -0,0 +1,115 @@
+"""JSON responses of transient GETs, with HTTP validators and conditional requests."""
+import hashlib
+from dataclasses import fields
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Iterable, Mapping, Optional
+
+from fastapi.responses import UJSONResponse
+from starlette.requests import Request
+from starlette.responses import Response
+
+from tnsquery.db.models.transient_model import Transient
+from tnsquery.services.metrics import STAGE_LATENCY
+from tnsquery.settings import settings
+
+TRANSIENT_FIELDS = tuple(field.name for field in fields(Transient))
+
+
+def transient_dict(transient: Transient) -> dict[str, Any]:
+    """
+    Transient as a plain dict, without validating it again.
+
+    :param transient: transient.
+    :return: its fields.
+    """
+    return {field: getattr(transient, field) for field in TRANSIENT_FIELDS}
+
+
+def make_etag(transients: Iterable[Mapping[str, Any]], *extra: object) -> str:
+    """
+    Strong entity tag of transient data.
+
+    The tag is a hash of the field values, so it changes with any write
+    to the transients, and is computed without serializing the response.
+
+    :param transients: transients of the response, as dicts.
+    :param extra: other values the response depends on, e.g. a cursor.
+    :return: quoted entity tag.
+    """
+    digest = hashlib.blake2b(digest_size=16)  # noqa: WPS432
+    for transient in transients:
+        digest.update(repr(tuple(transient[field] for field in TRANSIENT_FIELDS)).encode())
+    digest.update(repr(extra).encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def last_modified(fetched_at: Iterable[Optional[datetime]]) -> Optional[datetime]:
+    """
+    Last modification time of a response.
+
+    :param fetched_at: TNS fetch times (UTC) of its transients.
+    :return: the latest of them, None if any of them is unknown or there are none.
+    """
+    times = list(fetched_at)
+    if not times or None in times:
+        return None
+    return max(times)  # type: ignore
+
+
+def json_response(
+    request: Request,
+    content: Any,
+    etag: str,
+    modified: Optional[datetime] = None,
+    stale: bool = False,
+) -> Response:
+    """
+    JSON response with cache headers, or a 304 if the client has this version.
+
+    The content is encoded as is, FastAPI does not validate returned responses
+    against the response_model again. If-None-Match takes precedence over
+    If-Modified-Since, as in RFC 7232.
+
+    :param request: current request.
+    :param content: JSON compatible content, only encoded if it is sent.
+    :param etag: entity tag of the content.
+    :param modified: last modification time (UTC), if known.
+    :param stale: whether the content could not be brought up to date,
+        it is then sent with a Warning header and must not be reused.
+    :return: response.
+    """
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.http_cache_max_age}",
+    }
+    if stale:
+        headers["Cache-Control"] = "no-cache"
+        headers["Warning"] = '110 - "Response is Stale"'
+
+    if modified is not None:
+        headers["Last-Modified"] = format_datetime(
+            modified.replace(tzinfo=timezone.utc, microsecond=0),
+            usegmt=True,
+        )
+    if _not_modified(request, etag, modified):
+        return Response(status_code=304, headers=headers)
+    with STAGE_LATENCY.time("serialization"):
+        return UJSONResponse(content, headers=headers)
+
+
+def _not_modified(request: Request, etag: str, modified: Optional[datetime]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
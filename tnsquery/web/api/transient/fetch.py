@@ -0,0 +1,102 @@
+import asyncio
+from typing import List, Optional
+
+from fastapi import Depends
+
+from tnsquery.db.dao.missing_transient_dao import MissingTransientDAO
+from tnsquery.db.dao.transient_dao import TransientDAO
+from tnsquery.db.names import is_iau_name, normalize_name
+from tnsquery.services.cache import CachedTransient, TransientCache, TTLCache
+from tnsquery.services.dependencies import (
+    get_negative_cache,
+    get_tns_api,
+    get_tns_single_flight,
+    get_transient_cache,
+    get_write_behind,
+)
+from tnsquery.services.singleflight import SingleFlight
+from tnsquery.services.tns import TNSAPI, TransientNotFoundError
+from tnsquery.services.writebehind import WriteBehindQueue
+from tnsquery.settings import settings
+
+
+class TransientFetcher:
+    """
+    Fetch transients from TNS and store them, for the transient endpoints.
+
+    Concurrent fetches of the same name share a single TNS request, whichever
+    endpoint and worker task they come from, the refresher included: they are
+    all keyed by the normalized name. Fetches of one request store through its
+    session one at a time, as a session runs a single statement at a time,
+    and commit before the transient is cached.
+    """
+
+    def __init__(
+        self,
+        writer: TransientDAO = Depends(),
+        missing_dao: MissingTransientDAO = Depends(),
+        tns: TNSAPI = Depends(get_tns_api),
+        flight: SingleFlight = Depends(get_tns_single_flight),
+        cache: TransientCache = Depends(get_transient_cache),
+        negative_cache: TTLCache[str, bool] = Depends(get_negative_cache),
+        write_behind: Optional[WriteBehindQueue] = Depends(get_write_behind),
+    ) -> None:
+        self.writer = writer
+        self.missing_dao = missing_dao
+        self.tns = tns
+        self.flight = flight
+        self.cache = cache
+        self.negative_cache = negative_cache
+        self.write_behind = write_behind
+        self._write_lock = asyncio.Lock()
+
+    async def fetch(self, name: str) -> CachedTransient:
+        """
+        Fetch a transient from TNS, or join the fetch already in flight for it.
+
+        The transient is stored, or queued with write_behind, and cached under
+        the requested name. Names TNS does not know are remembered as missing.
+
+        :param name: name of the transient as requested.
+        :raises TransientNotFoundError: if TNS does not know the name.
+        :return: the fetched transient.
+        """
+        key = normalize_name(name)
+        return await self.flight.do(key, lambda: self._fetch_and_store(name, key))
+
+    async def remember_missing(self, keys: List[str]) -> None:
+        """
+        Store names TNS reported as not found.
+
+        :param keys: normalized names.
+        """
+        for key in keys:
+            self.negative_cache.put(key, True)
+        if settings.negative_cache_db and keys:
+            async with self._write_lock:
+                await self.missing_dao.add_missing(keys)
+
+    async def _fetch_and_store(self, name: str, key: str) -> CachedTransient:
+        try:
+            fetched, aliases = await self.tns.make_transient_and_aliases(_tns_name(name))
+        except TransientNotFoundError:
+            await self.remember_missing([key])
+            raise
+        if self.write_behind is not None:
+            entry = await self.write_behind.add(fetched, aliases)
+        else:
+            async with self._write_lock:
+                at = await self.writer.upsert_transient(fetched)
+                await self.writer.add_aliases({at.name: aliases})
+                await self.writer.session.commit()
+            entry = CachedTransient(at.as_transient(), at.fetched_at)
+        self.negative_cache.pop(key)
+        self.cache.refresh(*entry)
+        self.cache.put(key, entry)
+        return entry
+
+
+def _tns_name(name: str) -> str:
+    """TNS expects IAU names without prefix, other names are passed as given."""
+    key = normalize_name(name)
+    return key if is_iau_name(key) else name.strip()
@@ -0,0 +1,31 @@
+from typing import Optional
+
+from pydantic import BaseModel, conlist
+
+from tnsquery.db.models.transient_model import Transient
+from tnsquery.settings import settings
+
+
+class TransientBatchRequest(BaseModel):
+    """Names of transients to resolve in one call."""
+
+    names: conlist(str, min_items=1, max_items=settings.batch_max_names)  # type: ignore
+
+
+class TransientBatchResponse(BaseModel):
+    """Per-name results of a batch lookup."""
+
+    # Resolved transients keyed by the requested name
+    found: dict[str, Transient] = {}
+    # Names that neither the database nor TNS know about
+    not_found: list[str] = []
+    # Names that could not be fetched from TNS, with the reason
+    errors: dict[str, str] = {}
+
+
+class TransientPage(BaseModel):
+    """One page of the transients listing."""
+
+    items: list[Transient]
+    # Cursor of the next page, None on the last page
+    next_cursor: Optional[str] = None
@@ -1,56 +1,381 @@
-from fastapi import APIRouter, Depends
+import asyncio
+import base64
+import binascii
+import math
+from datetime import timedelta
+from typing import AsyncIterator, List, Optional
+
+import ujson
+from httpx import HTTPError
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import Response, StreamingResponse, UJSONResponse
 from fastapi.exceptions import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import scoped_session
+from starlette.requests import Request
 from tnsquery.db.models.transient_model import Transient
 from tnsquery.db.dao import transient_dao
+from tnsquery.db.dao.missing_transient_dao import MissingTransientDAO
 from tnsquery.db.dao.transient_dao import TransientDAO
-from tnsquery.services.tns import TNSAPI
+from tnsquery.db.names import normalize_name
+from tnsquery.services.breaker import CircuitOpenError
+from tnsquery.services.ratelimit import TNSRateLimitError
+from tnsquery.services.tns import TransientNotFoundError
+from tnsquery.services.cache import CachedTransient, TransientCache, TTLCache
+from tnsquery.services.metrics import STAGE_LATENCY
+from tnsquery.services.dependencies import (
+    get_negative_cache,
+    get_transient_cache,
+    get_transient_refresher,
+    get_write_behind,
+)
+from tnsquery.services.refresh import TransientRefresher
+from tnsquery.services.writebehind import WriteBehindQueue
 from tnsquery.db.dependencies import get_db_session
+from tnsquery.settings import settings
+from tnsquery.web.api.transient.fetch import TransientFetcher
+from tnsquery.web.api.transient.conditional import (
+    json_response,
+    last_modified,
+    make_etag,
+    transient_dict,
+)
+from tnsquery.web.api.transient.schema import (
+    TransientBatchRequest,
+    TransientBatchResponse,
+    TransientPage,
+)
 
 router = APIRouter()
 
 
 @router.get("/transient/{name}", response_model=Transient)
-async def get_transient(name: str, force_tns: bool = False, dao: TransientDAO = Depends()) -> Transient:
+async def get_transient(
+    name: str,
+    request: Request,
+    force_tns: bool = False,
+    dao: TransientDAO = Depends(TransientDAO.read_only),
+    fetcher: TransientFetcher = Depends(),
+    cache: TransientCache = Depends(get_transient_cache),
+    negative_cache: "TTLCache[str, bool]" = Depends(get_negative_cache),
+    missing_dao: MissingTransientDAO = Depends(MissingTransientDAO.read_only),
+    refresher: TransientRefresher = Depends(get_transient_refresher),
+    write_behind: Optional[WriteBehindQueue] = Depends(get_write_behind),
+) -> Response:
     """
     Get transient data. If transient is not in the database or if force_tns 
     is True, it will be fetched from TNS (even if it is in the database).
-    Else, it will be loaded from the database.
+    Else, it will be loaded from the cache or the database. A stored
+    transient older than refresh_after is still returned right away
+    and refreshed from TNS in the background.
+    Concurrent fetches of the same name share a single TNS request.
+    If the TNS quota is used up, a 503 with a Retry-After header is returned.
+    Names TNS did not know are answered with a 404 without asking TNS again
+    until negative_cache_ttl has passed, unless force_tns is True.
+    If TNS keeps failing, lookups fail fast with a 503 for a while,
+    with force_tns the stored transient is returned with a stale Warning header.
+
+    The name may be an IAU name in any spelling ("SN 2022abc", "AT2022abc",
+    "2022abc") or a survey internal name of a transient fetched before.
+
+    Responses carry ETag, Last-Modified and Cache-Control headers,
+    If-None-Match and If-Modified-Since are answered with a 304.
+
+    With write_behind enabled, fetched transients are stored shortly
+    after the response, in batches, and served from the queue meanwhile.
 
     Returns the data for a given transient.
     """
+    key = normalize_name(name)
+    entry: Optional[CachedTransient] = None
     if not force_tns:
-        at = await dao.get_transient(name)
-        if at is not None:
-            return at.as_transient()
-    
+        entry = cache.get(key)
+        if entry is None and write_behind is not None:
+            entry = write_behind.get(key)
+        if entry is None:
+            at = await dao.get_transient(key)
+            if at is not None:
+                entry = CachedTransient(at.as_transient(), at.fetched_at)
+                cache.put(key, entry)
+                if refresher.is_stale(at):
+                    refresher.schedule(at.name)
+        if entry is None and await _known_missing([key], negative_cache, missing_dao):
+            raise HTTPException(status_code=404, detail=f"Transient {name} not found.")
+
     # Transient not found in DB or force reload was set, try to fetch it from TNS.
-    async with TNSAPI() as tns:
-        transient = await tns.make_transient(name)
-        at = await dao.create_transient_model(transient)
+    if entry is None:
+        # Give the read connection back, requests waiting on TNS hold none.
+        await dao.session.close()
+        try:
+            entry = await fetcher.fetch(name)
+        except TransientNotFoundError:
+            raise HTTPException(status_code=404, detail=f"Transient {name} not found.")
+        except (TNSRateLimitError, CircuitOpenError, HTTPError) as exc:
+            # TNS is unavailable, a forced reload falls back to the stored row.
+            stored = await dao.get_transient(key) if force_tns else None
+            if stored is None:
+                raise _tns_unavailable(exc)
+            content = stored.as_dict()
+            return json_response(
+                request,
+                content,
+                make_etag([content]),
+                stored.fetched_at,
+                stale=True,
+            )
 
-    return at.as_transient()
+    content = transient_dict(entry.transient)
+    return json_response(request, content, make_etag([content]), entry.fetched_at)
 
 @router.patch("/transient/{name}/redshift", response_model=Transient)
-async def update_redshift(name:str, redshift: float, dao: TransientDAO = Depends()) -> Transient:
+async def update_redshift(
+    name: str,
+    redshift: float,
+    dao: TransientDAO = Depends(),
+    cache: TransientCache = Depends(get_transient_cache),
+    write_behind: Optional[WriteBehindQueue] = Depends(get_write_behind),
+) -> Transient:
     """
-    Update transient redshift"""
+    Update transient redshift, later fetches from TNS keep it."""
 
+    await _store_pending(name, write_behind)
     stored_at = await dao.get_transient(name)
     if not stored_at:
         raise HTTPException(status_code=404, detail=f"Transient {name} not found.")
     stored_at.redshift=redshift  # type: ignore
-    return stored_at.as_transient()
+    stored_at.redshift_manual=True  # type: ignore
+    await dao.notify_changed([stored_at.name])
+    # Commit first, the cache must not serve a change that is rolled back.
+    await dao.session.commit()
+    transient = stored_at.as_transient()
+    cache.refresh(transient, stored_at.fetched_at)
+    return transient
 
 @router.patch("/transient/{name}/ebv", response_model=Transient)
-async def update_ebv(name:str, ebv: float, dao: TransientDAO = Depends()) -> Transient:
+async def update_ebv(
+    name: str,
+    ebv: float,
+    dao: TransientDAO = Depends(),
+    cache: TransientCache = Depends(get_transient_cache),
+    write_behind: Optional[WriteBehindQueue] = Depends(get_write_behind),
+) -> Transient:
     """
     Update transient ebv"""
 
+    await _store_pending(name, write_behind)
     stored_at = await dao.get_transient(name)
     if not stored_at:
         raise HTTPException(status_code=404, detail=f"Transient {name} not found.")
     stored_at.ebv=ebv  # type: ignore
-    return stored_at.as_transient()
-  
+    await dao.notify_changed([stored_at.name])
+    # Commit first, the cache must not serve a change that is rolled back.
+    await dao.session.commit()
+    transient = stored_at.as_transient()
+    cache.refresh(transient, stored_at.fetched_at)
+    return transient
+
+
+@router.post("/transients/batch", response_model=TransientBatchResponse)
+async def get_transients_batch(
+    batch: TransientBatchRequest,
+    dao: TransientDAO = Depends(TransientDAO.read_only),
+    fetcher: TransientFetcher = Depends(),
+    cache: TransientCache = Depends(get_transient_cache),
+    negative_cache: "TTLCache[str, bool]" = Depends(get_negative_cache),
+    missing_dao: MissingTransientDAO = Depends(MissingTransientDAO.read_only),
+    write_behind: Optional[WriteBehindQueue] = Depends(get_write_behind),
+) -> Response:
+    """
+    Get data for many transients at once.
+
+    Known names are loaded from the cache and with a single database query,
+    only the rest are fetched from TNS, a few at a time, sharing the TNS
+    requests of single lookups of the same names. Names unknown to TNS are listed in not_found and
+    failed TNS lookups in errors, without failing the whole batch.
+    Names TNS recently did not know are listed in not_found without
+    asking TNS again.
+    """
+    names = list(dict.fromkeys(batch.names))
+    response = TransientBatchResponse()
+
+    missing = []
+    for name in names:
+        cached = cache.get(normalize_name(name))
+        if cached is None and write_behind is not None:
+            cached = write_behind.get(normalize_name(name))
+        if cached is None:
+            missing.append(name)
+        else:
+            response.found[name] = cached.transient
+
+    stored = await dao.get_transients(missing)
+    for name, at in stored.items():
+        transient = at.as_transient()
+        cache.put(normalize_name(name), CachedTransient(transient, at.fetched_at))
+        response.found[name] = transient
+    missing = [name for name in missing if name not in stored]
+    known_missing = await _known_missing(
+        [normalize_name(name) for name in missing],
+        negative_cache,
+        missing_dao,
+    )
+    response.not_found.extend(
+        name for name in missing if normalize_name(name) in known_missing
+    )
+    missing = [name for name in missing if normalize_name(name) not in known_missing]
+    # Give the read connection back, requests waiting on TNS hold none.
+    await dao.session.close()
+
+    semaphore = asyncio.Semaphore(settings.batch_tns_concurrency)
+
+    async def fetch(name: str) -> CachedTransient:
+        async with semaphore:
+            return await fetcher.fetch(name)
+
+    fetched = await asyncio.gather(
+        *(fetch(name) for name in missing),
+        return_exceptions=True,
+    )
+    for name, result in zip(missing, fetched):
+        if isinstance(result, TransientNotFoundError):
+            response.not_found.append(name)
+        elif isinstance(result, BaseException):
+            response.errors[name] = str(result) or type(result).__name__
+        else:
+            response.found[name] = result.transient
+    # Encode here, the response was built from validated transients already.
+    with STAGE_LATENCY.time("serialization"):
+        return UJSONResponse(
+            {
+                "found": {name: transient_dict(found) for name, found in response.found.items()},
+                "not_found": response.not_found,
+                "errors": response.errors,
+            },
+        )
+
+
+@router.get("/transients/cone", response_model=List[Transient])
+async def cone_search(
+    request: Request,
+    ra: float = Query(..., ge=0, lt=360, description="Right ascension in degrees."),
+    dec: float = Query(..., ge=-90, le=90, description="Declination in degrees."),
+    radius: float = Query(
+        ...,
+        gt=0,
+        le=settings.cone_max_radius,
+        description="Search radius in degrees.",
+    ),
+    limit: int = Query(100, gt=0, le=10000),
+    dao: TransientDAO = Depends(TransientDAO.read_only),
+) -> Response:
+    """
+    Get stored transients within radius of a position, closest first.
+
+    Only transients already in the database are searched, TNS is not queried.
+    Conditional requests are answered like for a single transient.
+    """
+    matches = await dao.cone_search(ra=ra, dec=dec, radius=radius, limit=limit)
+    transients = [at.as_dict() for at in matches]
+    return json_response(
+        request,
+        transients,
+        make_etag(transients),
+        last_modified(at.fetched_at for at in matches),
+    )
+
+
+@router.get("/transients", response_model=TransientPage)
+async def list_transients(
+    request: Request,
+    limit: int = Query(100, gt=0, le=1000),
+    cursor: Optional[str] = None,
+    dao: TransientDAO = Depends(TransientDAO.read_only),
+) -> Response:
+    """
+    List stored transients, one page at a time.
+
+    Pass the next_cursor of a page as cursor to get the following page.
+    Conditional requests are answered like for a single transient.
+    """
+    transients = await dao.get_transients_after(limit, _decode_cursor(cursor))
+    items = [at.as_dict() for at in transients]
+    next_cursor = None
+    if len(transients) == limit:
+        next_cursor = _encode_cursor(transients[-1].id)
+    return json_response(
+        request,
+        {"items": items, "next_cursor": next_cursor},
+        make_etag(items, next_cursor),
+        last_modified(at.fetched_at for at in transients),
+    )
+
+
+@router.get("/transients/ndjson")
+async def stream_transients(dao: TransientDAO = Depends()) -> StreamingResponse:
+    """
+    Stream every stored transient as newline delimited JSON.
+
+    Rows are read through a server-side cursor and sent as they arrive,
+    so memory use is constant on both ends however large the table is.
+    """
+
+    async def ndjson_lines() -> AsyncIterator[str]:
+        async for batch in dao.stream_transients():
+            yield "".join(f"{ujson.dumps(row)}\n" for row in batch)
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+
+def _tns_unavailable(exc: Exception) -> HTTPException:
+    if isinstance(exc, (TNSRateLimitError, CircuitOpenError)):
+        return HTTPException(
+            status_code=503,
+            detail=str(exc),
+            headers={"Retry-After": str(math.ceil(exc.retry_after))},
+        )
+    return HTTPException(status_code=502, detail=f"TNS request failed: {type(exc).__name__}")
+
+
+async def _store_pending(name: str, write_behind: Optional[WriteBehindQueue]) -> None:
+    """Store a transient still waiting in the write-behind queue, before it is updated."""
+    if write_behind is not None and write_behind.get(normalize_name(name)) is not None:
+        await write_behind.flush()
+
+
+def _encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode()
+
+
+def _decode_cursor(cursor: Optional[str]) -> int:
+    if cursor is None:
+        return 0
+    try:
+        return int(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+
+async def _known_missing(
+    keys: List[str],
+    negative_cache: "TTLCache[str, bool]",
+    missing_dao: MissingTransientDAO,
+) -> set[str]:
+    """
+    Find the names TNS recently reported as not found.
+
+    :param keys: normalized names.
+    :param negative_cache: not found cache of this worker.
+    :param missing_dao: not found results shared through the database.
+    :return: the keys known to be missing.
+    """
+    known = {key for key in keys if negative_cache.get(key)}
+    unknown = [key for key in keys if key not in known]
+    if settings.negative_cache_db and unknown:
+        stored = await missing_dao.get_missing(
+            unknown,
+            timedelta(seconds=settings.negative_cache_ttl),
+        )
+        for key in stored:
+            negative_cache.put(key, True)
+        known |= stored
+    return known
@@ -4,8 +4,10 @@ from fastapi import FastAPI, Depends
 from fastapi.responses import UJSONResponse
 from tnsquery.db.dependencies import get_db_session
 
+from tnsquery.settings import settings
 from tnsquery.web.api.router import api_router
-from tnsquery.web.lifetime import register_shutdown_event, register_startup_event, create_db_tables
+from tnsquery.web.lifetime import register_shutdown_event, register_startup_event
+from tnsquery.web.middleware import MetricsMiddleware
 from tnsquery.db.base import Base
 
 
@@ -30,10 +32,11 @@ def get_app() -> FastAPI:
     # Adds startup and shutdown events.
     register_startup_event(app)
     register_shutdown_event(app)
-    # create_db_tables(app)
-    # create_db_tables(app)
 
     # Main router for the API.
     app.include_router(router=api_router, prefix="/api")
 
+    if settings.metrics_enabled:
+        app.add_middleware(MetricsMiddleware)
+
     return app
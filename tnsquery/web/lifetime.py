@@ -1,42 +1,179 @@
-from asyncio import current_task
+import asyncio
+import logging
+from datetime import timedelta
 from typing import Awaitable, Callable
 
 from fastapi import FastAPI
-from sqlalchemy.ext.asyncio import (
-    AsyncSession,
-    async_scoped_session,
-    create_async_engine,
-)
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import sessionmaker
-from tnsquery.db.base import Base
+from tnsquery.db.utils import DB_REVISION, create_db_engine, get_db_revision
+from tnsquery.services.cache import TransientCache, TTLCache
+from tnsquery.services.invalidation import CacheInvalidator
+from tnsquery.services.metrics import instrument_engine
+from tnsquery.services.refresh import TransientRefresher
+from tnsquery.services.singleflight import SingleFlight
+from tnsquery.services.sync import TNSSync
+from tnsquery.services.tns import create_dust_map, create_tns_api
+from tnsquery.services.writebehind import WriteBehindQueue
 from tnsquery.settings import settings
 
+logger = logging.getLogger(__name__)
+
 
 def _setup_db(app: FastAPI) -> None:  # pragma: no cover
     """
     Creates connection to the database.
 
     This function creates SQLAlchemy engine instance,
-    session_factory for creating sessions
+    session factories for read-write and read-only sessions
     and stores them in the application's state property.
+    Read-only sessions share the engine's pool but run in autocommit mode.
 
     :param app: fastAPI application.
     """
     print(str(settings.db_url))
-    engine = create_async_engine(str(settings.db_url), echo=settings.db_echo, future=True)
+    engine = create_db_engine()
     
-    session_factory = async_scoped_session(
-        sessionmaker(
-            engine,
-            expire_on_commit=False,
-            class_=AsyncSession,  # type: ignore
-            future=True,
-        ),
-        scopefunc=current_task,
+    session_factory = sessionmaker(
+        engine,
+        expire_on_commit=False,
+        class_=AsyncSession,  # type: ignore
+        future=True,
+    )
+    read_session_factory = sessionmaker(
+        engine.execution_options(isolation_level="AUTOCOMMIT"),
+        expire_on_commit=False,
+        class_=AsyncSession,  # type: ignore
+        future=True,
     )
 
+    if settings.metrics_enabled:
+        instrument_engine(engine)
+
     app.state.db_engine = engine
     app.state.db_session_factory = session_factory
+    app.state.db_read_session_factory = read_session_factory
+
+
+def _setup_dust_map(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Opens the SFD dust map, if one is configured.
+
+    The map files are memory mapped, so only the pages
+    around looked up positions are ever read from disk.
+
+    :param app: fastAPI application.
+    """
+    app.state.dust_map = create_dust_map()
+
+
+def _setup_tns(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Creates the shared TNS API client.
+
+    A single keep-alive connection pool to TNS is reused
+    by all requests instead of opening a new one per lookup,
+    and concurrent lookups of the same name are coalesced.
+    Requests are throttled to the TNS quota shared by all workers.
+
+    :param app: fastAPI application.
+    """
+    app.state.tns_api = create_tns_api(dust_map=app.state.dust_map)
+    app.state.tns_single_flight = SingleFlight()
+
+
+def _setup_cache(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Creates the in-memory transient cache.
+
+    Names TNS does not know are cached separately,
+    so repeated lookups of them do not reach TNS.
+
+    :param app: fastAPI application.
+    """
+    app.state.transient_cache = TransientCache(
+        maxsize=settings.cache_size,
+        ttl=settings.cache_ttl,
+        record_stats=settings.cache_stats,
+    )
+    app.state.negative_cache = TTLCache(
+        maxsize=settings.negative_cache_size,
+        ttl=settings.negative_cache_ttl,
+        record_stats=settings.cache_stats,
+    )
+
+
+def _start_invalidation(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Starts listening for transients changed by other workers.
+
+    Changed transients are dropped from the caches of this worker,
+    so every worker serves writes made by any of them.
+
+    :param app: fastAPI application.
+    """
+    app.state.cache_invalidator = None
+    if not settings.cache_invalidation:
+        return
+    app.state.cache_invalidator = CacheInvalidator(
+        engine=app.state.db_engine,
+        cache=app.state.transient_cache,
+        negative_cache=app.state.negative_cache,
+    )
+    app.state.cache_invalidator.start()
+
+
+def _setup_refresher(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Creates the background refresher of stale transients.
+
+    :param app: fastAPI application.
+    """
+    app.state.transient_refresher = TransientRefresher(
+        engine=app.state.db_engine,
+        tns=app.state.tns_api,
+        flight=app.state.tns_single_flight,
+        cache=app.state.transient_cache,
+        max_age=timedelta(seconds=settings.refresh_after),
+    )
+
+
+def _start_write_behind(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Starts the batched writes of transients fetched on lookups.
+
+    :param app: fastAPI application.
+    """
+    app.state.write_behind = None
+    if not settings.write_behind:
+        return
+    app.state.write_behind = WriteBehindQueue(
+        engine=app.state.db_engine,
+        interval=settings.write_behind_interval,
+        max_rows=settings.write_behind_max_rows,
+    )
+    app.state.write_behind.start()
+
+
+def _start_sync(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Starts the background sync of stored transients with TNS.
+
+    The sync runs as a task on the event loop and only awaits I/O,
+    so it does not hold up request handling.
+
+    :param app: fastAPI application.
+    """
+    app.state.sync_task = None
+    if not settings.sync_enabled:
+        return
+    sync = TNSSync(
+        engine=app.state.db_engine,
+        tns=app.state.tns_api,
+        chunk_size=settings.sync_chunk_size,
+        initial_lookback=timedelta(days=settings.sync_initial_lookback_days),
+    )
+    app.state.sync_task = asyncio.create_task(sync.run_forever(settings.sync_interval))
 
 
 def register_startup_event(
@@ -55,7 +192,14 @@ def register_startup_event(
     @app.on_event("startup")
     async def _startup() -> None:  # noqa: WPS430
         _setup_db(app)
-        await create_db_tables(app)
+        _setup_dust_map(app)
+        _setup_tns(app)
+        _setup_cache(app)
+        _setup_refresher(app)
+        await check_db_revision(app)
+        _start_invalidation(app)
+        _start_write_behind(app)
+        _start_sync(app)
         pass  # noqa: WPS420
 
     return _startup
@@ -73,6 +217,15 @@ def register_shutdown_event(
 
     @app.on_event("shutdown")
     async def _shutdown() -> None:  # noqa: WPS430
+        if app.state.sync_task is not None:
+            app.state.sync_task.cancel()
+            await asyncio.gather(app.state.sync_task, return_exceptions=True)
+        await app.state.transient_refresher.aclose()
+        if app.state.write_behind is not None:
+            await app.state.write_behind.aclose()
+        if app.state.cache_invalidator is not None:
+            await app.state.cache_invalidator.aclose()
+        await app.state.tns_api.aclose()
         await app.state.db_engine.dispose()
 
         pass  # noqa: WPS420
@@ -80,13 +233,22 @@ def register_shutdown_event(
     return _shutdown
 
 
-async def create_db_tables(app: FastAPI) -> None:  # pragma: no cover
+async def check_db_revision(app: FastAPI) -> None:  # pragma: no cover
     """
-    Create database tables.
+    Check that the database is migrated to the schema of this code.
+
+    Tables are created and updated by `alembic upgrade head` before
+    the application starts, this is a single cheap query.
 
     :param app: fastAPI application.
+    :raises RuntimeError: if the database was never migrated.
     """
-    engine = app.state.db_engine
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    
\ No newline at end of file
+    revision = await get_db_revision(app.state.db_engine)
+    if revision is None:
+        raise RuntimeError("The database is not migrated, run `alembic upgrade head`.")
+    if revision != DB_REVISION:
+        logger.warning(
+            "Database is at revision %s, expected %s, run `alembic upgrade head`.",
+            revision,
+            DB_REVISION,
+        )
@@ -0,0 +1,56 @@
+import time
+from typing import Any, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from tnsquery.services.metrics import REQUEST_LATENCY
+
+
+class MetricsMiddleware:
+    """
+    Record the latency of every HTTP request, per method, route and status.
+
+    Requests are labelled with the path template of their route
+    (e.g. /api/transient/{name}), not the requested path,
+    so the number of series stays bounded.
+    This is a plain ASGI middleware, it adds no task or
+    response copy to requests, unlike BaseHTTPMiddleware.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self._paths: Optional[dict[Any, str]] = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+
+        async def send_with_status(message: Message) -> None:  # noqa: WPS430
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUEST_LATENCY.observe(
+                time.perf_counter() - started,
+                scope["method"],
+                self._route_path(scope),
+                status,
+            )
+
+    def _route_path(self, scope: Scope) -> str:
+        # The router stores the endpoint of the matched route in the scope.
+        if self._paths is None:
+            self._paths = {
+                route.endpoint: route.path  # type: ignore
+                for route in scope["app"].routes
+                if hasattr(route, "endpoint")
+            }
+        return self._paths.get(scope.get("endpoint"), "unmatched")